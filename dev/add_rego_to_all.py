@@ -16,7 +16,7 @@ async def get_reg_no(site: BaseSite):
 
 async def main():
     # 1. Scan the dataset (returns a LazyFrame)
-    lf = scan_dataset()
+    lf = scan_dataset(materialize_objects=True)
 
     # 2. Filter for rows where 'reg_no' is null and collect only the 'site' column
     # We use .collect() here because we need the actual values to kick off the coroutines
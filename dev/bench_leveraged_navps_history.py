@@ -0,0 +1,74 @@
+"""Compare LeveragedTadbirPardaz.navps_history with the chained-join version.
+
+Run ``python dev/bench_leveraged_navps_history.py``.
+"""
+
+from json import loads
+from pathlib import Path
+from timeit import repeat
+
+import polars as pl
+
+from iranetf.sites._tadbirpardaz import (
+    _LEVERAGED_NAVPS_NAMES,
+    _leveraged_navps_history,
+)
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def chained_joins(j: list) -> pl.LazyFrame:
+    combined: pl.LazyFrame | None = None
+    for i, name in zip(j, _LEVERAGED_NAVPS_NAMES):
+        lf = (
+            pl.LazyFrame(i['List'])
+            .select(
+                pl.col('x')
+                .str.to_date('%m/%d/%Y', strict=False)
+                .alias('date'),
+                pl.col('y').cast(pl.Float64).alias(name),
+            )
+            .unique(subset=['date'])
+        )
+        combined = (
+            lf
+            if combined is None
+            else combined.join(lf, on='date', how='full', coalesce=True)
+        )
+    assert combined is not None
+    return combined
+
+
+def synthetic(years: int) -> list:
+    points = [
+        {'x': f'{m}/{d}/{y}', 'y': d * 1000 + m, 'name': None}
+        for y in range(2025 - years, 2025)
+        for m in range(1, 13)
+        for d in range(1, 29)
+    ]
+    return [{'List': points} for _ in _LEVERAGED_NAVPS_NAMES]
+
+
+def main():
+    recorded = loads((TESTDATA / 'ahrom_navps_history.json').read_bytes())
+    misaligned = synthetic(10)
+    del misaligned[0]['List'][::2]
+    for label, j in (
+        ('ahrom', recorded),
+        ('10 years', synthetic(10)),
+        ('50 years', synthetic(50)),
+        ('10 years, misaligned', misaligned),
+    ):
+        new = _leveraged_navps_history(j).collect()
+        old = chained_joins(j).collect().sort('date')
+        assert new.equals(old.select(new.columns)), label
+        for name, func in (
+            ('joins', chained_joins),
+            ('new', _leveraged_navps_history),
+        ):
+            best = min(repeat(lambda: func(j).collect(), number=1, repeat=5))
+            print(f'{label:>22} {name:>5}: {best * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
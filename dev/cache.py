@@ -2,7 +2,7 @@ from asyncio import gather, run
 
 from iranetf.dataset import scan_dataset
 
-ds = scan_dataset()
+ds = scan_dataset(materialize_objects=True)
 
 
 async def main():
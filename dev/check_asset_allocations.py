@@ -5,7 +5,7 @@ from aiohttp import ClientConnectorDNSError, ClientResponseError
 from dev import logger
 from iranetf.dataset import scan_dataset
 
-ds = scan_dataset()
+ds = scan_dataset(materialize_objects=True)
 
 
 async def main():
@@ -6,7 +6,7 @@ from aiohttp import ClientConnectorCertificateError
 from iranetf.dataset import scan_dataset
 from iranetf.sites import RayanHamafza
 
-ds = scan_dataset()
+ds = scan_dataset(materialize_objects=True)
 
 
 async def check_version(site):
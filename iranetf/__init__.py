@@ -1,26 +1,183 @@
+from __future__ import annotations as _
+
 __version__ = '12.0.3.dev1'
 
 from logging import getLogger as _get_logger
+from os import environ as _environ
+from pathlib import Path as _Path
+from typing import TYPE_CHECKING as _TYPE_CHECKING, Any as _Any
+from urllib.parse import urlsplit as _urlsplit
 
 from aiohttp import (
+    ClientConnectionError as _ClientConnectionError,
     ClientResponse as _ClientResponse,
+    ClientResponseError as _ClientResponseError,
+    ClientTimeout as _ClientTimeout,
+    TCPConnector as _TCPConnector,
+    ThreadedResolver as _ThreadedResolver,
 )
 from aiohutils.session import SessionManager
 
-session_manager = SessionManager()
+from iranetf.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    _breaker_disabled,
+)
+
+if _TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from iranetf.response_cache import CachedResponse, HTTPCache
+
+# keyword arguments of the TCPConnector of every session, see configure_http
+_connector_kwargs: dict = {'ttl_dns_cache': 60 * 60 * 24}
+
+
+def _connector() -> _TCPConnector:
+    return _TCPConnector(resolver=_ThreadedResolver(), **_connector_kwargs)
+
+
+session_manager = SessionManager(_connector)
+# session managers that are configured by configure_http
+_session_managers: list[SessionManager] = [session_manager]
 logger = _get_logger(__name__)
 
 
 ssl: bool = False  # as horrible as this is, many sites fail ssl verification
 
+# Set to a `response_cache.HTTPCache` to cache HTTP responses on disk.
+http_cache: HTTPCache | None = None
+
+# The JSON decoder of API responses. orjson is used if it is installed, see
+# the `fast` extra. Can be replaced, e.g. with `msgspec.json.decode`.
+json_loads: Callable[[bytes | str], _Any]
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Hosts that fail this many consecutive requests are not contacted for
+# `cooldown` seconds, see `retry.CircuitBreaker`. Set to None to disable.
+circuit_breaker: CircuitBreaker | None = CircuitBreaker(
+    threshold=5, cooldown=60.0
+)
+
+
+def _loads(data: bytes | str) -> _Any:
+    # looks up json_loads on each call so that it can be replaced at runtime
+    return json_loads(data)
+
 
 class RegNoError(KeyError):
     pass
 
 
+def configure_http(
+    *,
+    limit: int | None = None,
+    limit_per_host: int | None = None,
+    keepalive_timeout: float | None = None,
+    ttl_dns_cache: int | None = None,
+    happy_eyeballs_delay: float | None = None,
+    timeout: _ClientTimeout | None = None,
+):
+    """Configure the connection pool and timeouts of the HTTP sessions.
+
+    Applies to both `iranetf` and `iranetf.rahavard365`. Arguments that are
+    not given keep their current values. The settings of `aiohttp.TCPConnector`
+    and `aiohttp.ClientTimeout` are used, e.g. `limit_per_host=0` means no
+    limit.
+
+    Must be called before the first request or after the sessions are closed.
+    """
+    managers = _session_managers
+    for manager in managers:
+        if (session := manager._session) is not None and not session.closed:
+            raise RuntimeError(
+                'configure_http must be called before opening the session'
+            )
+
+    for name, value in (
+        ('limit', limit),
+        ('limit_per_host', limit_per_host),
+        ('keepalive_timeout', keepalive_timeout),
+        ('ttl_dns_cache', ttl_dns_cache),
+        ('happy_eyeballs_delay', happy_eyeballs_delay),
+    ):
+        if value is not None:
+            _connector_kwargs[name] = value
+
+    for manager in managers:
+        # a closed session is replaced with one that uses the new settings
+        manager._session = None
+        if timeout is not None:
+            manager.timeout = timeout
+
+
+def _cache_dir() -> _Path:
+    return (
+        _Path(_environ.get('XDG_CACHE_HOME') or _Path.home() / '.cache')
+        / 'iranetf'
+    )
+
+
+async def _request(
+    url: str,
+    params: dict | None = None,
+    cookies: dict | None = None,
+    headers: dict | None = None,
+) -> _ClientResponse:
+    breaker = None if _breaker_disabled.get() else circuit_breaker
+    if breaker is None:
+        return await session_manager.request(
+            'get',
+            url,
+            ssl=ssl,
+            cookies=cookies,
+            params=params,
+            headers=headers,
+        )
+
+    host = _host(url)
+    if not breaker.allow(host):
+        raise CircuitOpenError(host)
+    try:
+        response = await session_manager.request(
+            'get',
+            url,
+            ssl=ssl,
+            cookies=cookies,
+            params=params,
+            headers=headers,
+        )
+    except _ClientResponseError as e:
+        if e.status >= 500:
+            breaker.failure(host)
+        else:
+            breaker.success(host)
+        raise
+    except _ClientConnectionError, TimeoutError:
+        breaker.failure(host)
+        raise
+    breaker.success(host)
+    return response
+
+
+def _deadline_expired(url: str):
+    # A deadline that is shorter than the session timeouts cancels a request
+    # to a hung host before _request can see an error, so callers that
+    # enforce one report it here.
+    if circuit_breaker is not None:
+        circuit_breaker.failure(_host(url))
+
+
 async def _get(
     url: str, params: dict | None = None, cookies: dict | None = None
-) -> _ClientResponse:
-    return await session_manager.request(
-        'get', url, ssl=ssl, cookies=cookies, params=params
-    )
+) -> _ClientResponse | CachedResponse:
+    if http_cache is not None:
+        return await http_cache.get(url, params, cookies)
+    return await _request(url, params, cookies)
+
+
+def _host(url: str) -> str:
+    return _urlsplit(url).netloc
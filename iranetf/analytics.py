@@ -0,0 +1,82 @@
+"""Market-wide analytics computed from all the funds in the dataset.
+
+Run ``python -m iranetf.analytics`` to print the leverage table of the whole
+market.
+"""
+
+from __future__ import annotations as _
+
+from asyncio import gather as _gather
+
+import polars as _pl
+
+from iranetf.sites import BaseSite as _BaseSite
+from iranetf.snapshot import (
+    _iter_results,
+    _Scheduler,
+    _sites,
+)
+
+_LEVERAGE_SCHEMA = {
+    'l18': _pl.String,
+    'cash': _pl.Float64,
+    'leverage': _pl.Float64,
+    'latency': _pl.Float64,
+    'error': _pl.String,
+}
+
+
+async def _cash_and_leverage(site: _BaseSite) -> tuple[float, float]:
+    # leverage() also needs the asset allocation of cache(); the concurrent
+    # identical requests are coalesced into one
+    return await _gather(site.cache(), site.leverage())
+
+
+async def leverage_table(
+    *,
+    type: str | None = None,
+    site_type: str | None = None,
+    group_id: int | None = None,
+    limit: int = 64,
+    per_host_limit: int = 4,
+    deadline: float = 10.0,
+) -> _pl.DataFrame:
+    """Return the cash ratio and leverage of every fund, sorted by l18.
+
+    `cash` is the result of `BaseSite.cache` and `leverage` the result of
+    `BaseSite.leverage`. The filtering and concurrency arguments are the same
+    as `iranetf.snapshot.snapshot`. Failed funds are reported in the `error`
+    column.
+    """
+    rows = []
+    async for l18, result, latency in _iter_results(
+        _sites(type, site_type, group_id),
+        _cash_and_leverage,
+        _Scheduler(limit, per_host_limit, deadline),
+    ):
+        if isinstance(result, Exception):
+            rows.append(
+                {'l18': l18, 'latency': latency, 'error': repr(result)}
+            )
+            continue
+        cash, leverage = result
+        rows.append(
+            {
+                'l18': l18,
+                'cash': cash,
+                'leverage': leverage,
+                'latency': latency,
+            }
+        )
+    return _pl.DataFrame(rows, schema=_LEVERAGE_SCHEMA).sort('l18')
+
+
+def _main():
+    from asyncio import run
+
+    with _pl.Config(tbl_rows=-1):
+        print(run(leverage_table()))
+
+
+if __name__ == '__main__':
+    _main()
@@ -1,19 +1,14 @@
 from __future__ import annotations as _
 
-from asyncio import gather as _gather, sleep as _sleep
+from asyncio import gather as _gather
 from contextlib import contextmanager as _contextmanager
-from json import JSONDecodeError
+from functools import cache as _cache, wraps as _wraps
+from json import JSONDecodeError, dumps as _dumps, loads as _loads
 from logging import Logger as _Logger
 from pathlib import Path as _Path
 
 import polars as _pl
-from aiohttp import (
-    ClientConnectorDNSError as _ClientConnectorDNSError,
-    ClientConnectorError as _ClientConnectorError,
-    ClientError as _ClientError,
-    ClientResponseError as _ClientResponseError,
-    ServerDisconnectedError as _ServerDisconnectedError,
-)
+from aiohttp import ClientError as _ClientError
 from aiohutils import logger as _aiohutils_logger
 from tsetmc.instruments import (
     Instrument as _Instrument,
@@ -26,13 +21,20 @@ from iranetf import (
     logger as _logger,
     sites as _sites,
 )
+from iranetf.retry import (
+    CircuitOpenError as _CircuitOpenError,
+    Failure as _Failure,
+    RetryPolicy as _RetryPolicy,
+)
 from iranetf.sites import (
     BaseSite as _BaseSite,
     LeveragedTadbirPardaz as _LeveragedTadbirPardaz,
     MabnaDP2 as _MabnaDP2,
     RayanHamafza2 as _RayanHamafza2,
     TadbirPardaz as _TadbirPardaz,
+    TadbirPardazMultiNAV as _TadbirPardazMultiNAV,
 )
+from iranetf.sites._lib import _ARABIC_TO_PERSIAN, _detect_site_type
 
 _ETF_TYPES = {  # numbers are according to fipiran
     6: 'Stock',
@@ -48,6 +50,21 @@ _ETF_TYPES = {  # numbers are according to fipiran
 }
 
 _DATASET_PATH = _Path(__file__).parent / 'dataset.csv'
+# An uncompressed, memory-mappable copy of dataset.csv for fast loading.
+_DATASET_IPC_PATH = _DATASET_PATH.with_suffix('.arrow')
+
+_DATASET_SCHEMA = {
+    'l18': _pl.String,
+    'name': _pl.String,
+    'type': _pl.String,
+    'ins_code': _pl.String,
+    'reg_no': _pl.String,
+    'url': _pl.String,
+    'portfolio_id': _pl.String,
+    'site_type': _pl.String,
+    'dps_interval': _pl.Int8,
+    'group_id': _pl.Int8,
+}
 
 
 def _make_site(row: dict) -> _BaseSite:
@@ -62,24 +79,44 @@ def _make_site(row: dict) -> _BaseSite:
     return site_class(url=row['url'])
 
 
-def scan_dataset() -> _pl.LazyFrame:
-    """Load dataset.csv as a LazyFrame with site and inst structures pre-configured."""
-    return _pl.scan_csv(
-        _DATASET_PATH,
-        encoding='utf8',
-        schema={
-            'l18': _pl.String,
-            'name': _pl.String,
-            'type': _pl.String,
-            'ins_code': _pl.String,
-            'reg_no': _pl.String,
-            'url': _pl.String,
-            'portfolio_id': _pl.String,
-            'site_type': _pl.String,
-            'dps_interval': _pl.Int8,
-            'group_id': _pl.Int8,
-        },
-    ).with_columns(
+def _scan_csv() -> _pl.LazyFrame:
+    return _pl.scan_csv(_DATASET_PATH, encoding='utf8', schema=_DATASET_SCHEMA)
+
+
+def _scan_dataset_file() -> _pl.LazyFrame:
+    # prefer the IPC file unless dataset.csv has been modified after it
+    try:
+        if _DATASET_IPC_PATH.stat().st_mtime >= _DATASET_PATH.stat().st_mtime:
+            return _pl.scan_ipc(_DATASET_IPC_PATH)
+    except FileNotFoundError:
+        pass
+    return _scan_csv()
+
+
+def compile_dataset():
+    """Write dataset.arrow from dataset.csv.
+
+    `scan_dataset` loads the dataset from the IPC file whenever it is not
+    older than the CSV file. `sink_dataset` calls this automatically.
+    """
+    tmp = _DATASET_IPC_PATH.with_suffix('.tmp')
+    _scan_csv().sink_ipc(tmp, compression='uncompressed')
+    # replace instead of overwriting to keep existing memory maps valid
+    tmp.replace(_DATASET_IPC_PATH)
+
+
+def scan_dataset(*, materialize_objects: bool = False) -> _pl.LazyFrame:
+    """Load the dataset as a LazyFrame.
+
+    If `materialize_objects` is True, `site` and `inst` columns holding
+    `BaseSite` and tsetmc `Instrument` objects are added. Prefer
+    `iranetf.registry` for looking up a few sites, it only creates the objects
+    that are actually used.
+    """
+    lf = _scan_dataset_file()
+    if not materialize_objects:
+        return lf
+    return lf.with_columns(
         _pl.struct(['site_type', 'url', 'portfolio_id'])
         .map_elements(
             lambda r: (
@@ -101,14 +138,9 @@ def sink_dataset(ds: _pl.LazyFrame):
     """
     Processes the LazyFrame pipeline and streams it directly to disk.
     """
-    # 1. Fast, vectorized text translations handled lazily
+    # 1. Fast, vectorized text translations handled lazily in a single pass
     ds = ds.with_columns(
-        [
-            _pl.col('l18').str.replace_all('ي', 'ی').str.replace_all('ك', 'ک'),
-            _pl.col('name')
-            .str.replace_all('ي', 'ی')
-            .str.replace_all('ك', 'ک'),
-        ]
+        _pl.col('l18', 'name').str.replace_many(_ARABIC_TO_PERSIAN)
     )
 
     columns_order = [
@@ -129,52 +161,36 @@ def sink_dataset(ds: _pl.LazyFrame):
         _DATASET_PATH,
         include_bom=True,  # Protects Persian characters
     )
+    compile_dataset()
+
+    from iranetf import registry
+
+    registry.clear()
+
+
+_retry_policy = _RetryPolicy()
 
 
 def _log_and_retry(func):
+    """Call `func` with `_retry_policy` and log its failures.
+
+    The wrapper returns the `iranetf.retry.Failure` instead of raising.
+    """
+
+    @_wraps(func)
     async def wrapper(*args):
-        retry = 3
-        arg = args[0]
-        while True:
-            try:
-                return await func(*args)
-            except (
-                _ClientConnectorDNSError,
-                _ClientConnectorError,
-                _ServerDisconnectedError,
-            ) as e:
-                if retry <= 0:
-                    _logger.error(
-                        f'{func.__name__}: {type(e).__name__} for {arg}'
-                    )
-                    return
-                retry -= 1
-                _logger.debug(
-                    f'{func.__name__}: retrying {type(e).__name__} for {arg}'
-                )
-                await _sleep(2)
-                continue
-            except _ClientResponseError as e:
-                if e.status == 429 and retry > 0:
-                    await _sleep(5)
-                    retry -= 1
-                    continue
-                _logger.error(
-                    f'{func.__name__}: status {e.status} on {e.request_info.url}'
-                )
-                return
-            except TimeoutError:
-                if retry > 0:
-                    retry -= 1
-                    continue
-                _logger.error(f'{func.__name__}: TimeoutError on {arg}')
-                return
-            except (OSError, _ClientError) as e:
-                _logger.error(f'{func.__name__}: {e!r} on {arg}')
-                return
-            except Exception:
-                _logger.exception(f'{func.__name__}: {arg=}')
-                return
+        result = await _retry_policy.call(func, *args)
+        if isinstance(result, _Failure):
+            error = result.error
+            # unexpected errors are bugs, keep their traceback
+            expected = isinstance(
+                error, OSError | _ClientError | _CircuitOpenError
+            )
+            _logger.error(
+                f'{func.__name__}: {result!r} on {args[0]}',
+                exc_info=None if expected else error,
+            )
+        return result
 
     return wrapper
 
@@ -202,21 +218,72 @@ def set_level(logger: _Logger, level: str | int):
         logger.setLevel(old)
 
 
+@_log_and_retry
+async def _fingerprint(domain: str) -> tuple[str, str] | None:
+    response = await iranetf._get(f'http://{domain}/')
+    content = await response.read()
+    last_url = response.url
+    try:
+        site_type = _detect_site_type(str(last_url), content)[0]
+    except ValueError, AssertionError:
+        return
+    if site_type is _TadbirPardazMultiNAV:
+        # the default portfolio of a multi-NAV site works as a TadbirPardaz
+        site_type = _TadbirPardaz
+    elif site_type not in SITE_TYPES:
+        return
+    return f'{last_url.scheme}://{last_url.host}/', site_type.__name__
+
+
+def _url_types_path() -> _Path:
+    return iranetf._cache_dir() / 'url_types.json'
+
+
+@_cache
+def _url_types() -> dict[str, list[str]]:
+    try:
+        return _loads(_url_types_path().read_bytes())
+    except FileNotFoundError, JSONDecodeError:
+        return {}
+
+
+def _save_url_types():
+    path = _url_types_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(_dumps(_url_types(), ensure_ascii=False), encoding='utf8')
+    tmp.replace(path)
+
+
 async def _url_type(domain: str) -> tuple:
-    coros = [
-        _check_validity(site_type(f'http://{domain}/'))
-        for site_type in SITE_TYPES
-    ]
+    """Return the url and site type name of the website at `domain`.
+
+    The home page is fingerprinted first; API probes of all `SITE_TYPES` are
+    only sent if that fails. Results are memoized in `_url_types_path()`.
+    """
+    known = _url_types()
+    try:
+        return tuple(known[domain])
+    except KeyError:
+        pass
 
     with set_level(_logger, 'CRITICAL'):
-        results = await _gather(*coros)
+        result = await _fingerprint(domain)
+        if not result:  # inconclusive or failed
+            results = await _gather(
+                *[
+                    _check_validity(site_type(f'http://{domain}/'))
+                    for site_type in SITE_TYPES
+                ]
+            )
+            result = next((r for r in results if r), None)
 
-    for result in results:
-        if result is not None:
-            return result
+    if not result:
+        _logger.warning(f'failed for {domain}')
+        return None, None
 
-    _logger.warning(f'failed for {domain}')
-    return None, None
+    known[domain] = [*result]
+    return result
 
 
 async def _add_url_and_type(
@@ -245,6 +312,7 @@ async def _add_url_and_type(
         list_of_tuples = await _gather(
             *[_url_type(d) for d in domains_to_be_checked]
         )
+    _save_url_types()
 
     url_list, site_type_list = zip(*list_of_tuples)
 
@@ -414,7 +482,7 @@ async def _update_existing_rows_using_fipiran(
 
 async def update_dataset(*, update_existing=False) -> _pl.DataFrame:
     """Update dataset and return newly found that could not be added."""
-    ds = scan_dataset().drop('site', 'inst').collect()
+    ds = scan_dataset().collect()
     fipiran_df = (await _fipiran_data(ds.lazy())).collect()
 
     ds = await _update_existing_rows_using_fipiran(
@@ -496,7 +564,7 @@ async def _check_portfolio_counts(site: _BaseSite, dataset_ids: set[str]):
 
 
 async def check_dataset(live=False):
-    ds = scan_dataset().drop('site', 'inst').collect()
+    ds = scan_dataset().collect()
     _check_urls(ds)
     # Guardrail Match: All validation checks collapsed to true single boolean scalars
     assert ds['l18'].is_unique().all(), ds.filter(ds['l18'].is_duplicated())
@@ -557,6 +625,9 @@ async def check_dataset(live=False):
     finally:
         iranetf.ssl = orig_ssl
 
+    new_site_types = [
+        None if isinstance(st, _Failure) else st for st in new_site_types
+    ]
     # Dynamically update the specific row contents without altering unassigned blocks
     if any(st is not None for st in new_site_types):
         updates = _pl.DataFrame({'l18': ds['l18'], 'new_st': new_site_types})
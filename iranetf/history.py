@@ -0,0 +1,72 @@
+"""A local store of NAVPS histories that only downloads the missing days.
+
+Each fund is stored in its own Parquet file under `root`, which defaults to
+``~/.cache/iranetf/history``::
+
+    from iranetf.history import read_history, update_history
+
+    new_rows = await update_history(site)
+    history = read_history(site).collect()
+"""
+
+from __future__ import annotations as _
+
+from datetime import timedelta as _timedelta
+from pathlib import Path as _Path
+
+import polars as _pl
+
+from iranetf import _cache_dir, _host
+from iranetf.sites import BaseSite as _BaseSite
+
+
+def _path(site: _BaseSite, root: _Path | str | None) -> _Path:
+    if root is None:
+        root = _cache_dir() / 'history'
+    name = _host(site.url)
+    if site.portfolio_id:
+        name += f'-{site.portfolio_id}'
+    return _Path(root) / f'{name}.parquet'
+
+
+def read_history(
+    site: _BaseSite, root: _Path | str | None = None
+) -> _pl.LazyFrame:
+    """Return the stored NAVPS history of `site`."""
+    return _pl.scan_parquet(_path(site, root))
+
+
+async def update_history(
+    site: _BaseSite, root: _Path | str | None = None
+) -> _pl.DataFrame:
+    """Fetch the days after the last stored date and append them to the store.
+
+    Return the newly added rows.
+    """
+    path = _path(site, root)
+    if not path.exists():
+        new = (await site.navps_history()).collect()
+        stored = None
+    else:
+        stored = _pl.read_parquet(path)
+        last = stored['date'].max()
+        new = (
+            (await site.navps_history_since(last + _timedelta(days=1)))  # type: ignore
+            .filter(_pl.col('date') > last)
+            .collect()
+        )
+
+    new = new.unique('date', keep='last', maintain_order=True).sort('date')
+    if new.is_empty():
+        return new
+
+    if stored is None:
+        history = new
+        path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        history = _pl.concat([stored, new], how='diagonal_relaxed')
+
+    tmp = path.with_suffix('.tmp')
+    history.write_parquet(tmp)
+    tmp.replace(path)
+    return new
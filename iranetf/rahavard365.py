@@ -3,7 +3,10 @@ from json import loads
 import polars as pl
 from aiohutils.session import SessionManager
 
-session_manager = SessionManager()
+from iranetf import _connector, _session_managers
+
+session_manager = SessionManager(_connector)
+_session_managers.append(session_manager)
 
 HOME = 'https://rahavard365.com/'
 API = f'{HOME}api/v2/'
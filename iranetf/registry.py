@@ -0,0 +1,100 @@
+"""Memoized lookup of dataset sites by l18, name, reg_no, ins_code, or url.
+
+The dataset is indexed on first use. Site objects are only created when they
+are looked up and the same object is returned for later lookups::
+
+    from iranetf import registry
+
+    site = registry.site('l18', 'اهرم')
+    portfolios = registry.sites('url', 'https://agahsectorfund.ir/')
+
+The index is rebuilt after `iranetf.dataset.sink_dataset` writes the dataset.
+"""
+
+from __future__ import annotations as _
+
+from difflib import get_close_matches as _get_close_matches
+from functools import cache as _cache
+
+from iranetf.dataset import _make_site, scan_dataset as _scan_dataset
+from iranetf.sites import BaseSite as _BaseSite
+from iranetf.sites._lib import _ARABIC_TO_PERSIAN
+
+KEYS = ('l18', 'name', 'reg_no', 'ins_code', 'url')
+
+_normalize = str.maketrans(_ARABIC_TO_PERSIAN)
+
+_sites: dict[int, _BaseSite] = {}
+
+
+@_cache
+def _index() -> tuple[list[dict], dict[str, dict[str, list[int]]]]:
+    rows = _scan_dataset().collect().to_dicts()
+    index: dict[str, dict[str, list[int]]] = {key: {} for key in KEYS}
+    for i, row in enumerate(rows):
+        for key in KEYS:
+            if (value := row[key]) is not None:
+                index[key].setdefault(value, []).append(i)
+    return rows, index
+
+
+def _site(i: int) -> _BaseSite:
+    try:
+        return _sites[i]
+    except KeyError:
+        site = _sites[i] = _make_site(_index()[0][i])
+        return site
+
+
+def rows(key: str, value: str) -> list[dict]:
+    """Return the dataset rows whose `key` column equals `value`."""
+    all_rows, index = _index()
+    return [all_rows[i] for i in index[key].get(value, ())]
+
+
+def sites(key: str, value: str) -> list[_BaseSite]:
+    """Return the sites of the dataset rows whose `key` equals `value`."""
+    return [_site(i) for i in _index()[1][key].get(value, ())]
+
+
+def site(key: str, value: str, portfolio_id: str | None = None) -> _BaseSite:
+    """Return the site of the only dataset row whose `key` equals `value`.
+
+    `portfolio_id` selects one of the portfolios of a multi-portfolio website
+    when looking up a `reg_no` or `url`.
+    """
+    indices = _index()[1][key].get(value)
+    if not indices:
+        raise KeyError(f'{key} value {value!r} not found in dataset.')
+    if portfolio_id is not None:
+        indices = [i for i in indices if _site(i).portfolio_id == portfolio_id]
+        if not indices:
+            raise KeyError(
+                f'{key} value {value!r} has no {portfolio_id=} in dataset.'
+            )
+    if len(indices) != 1:
+        raise KeyError(
+            f'{key} value {value!r} matches more than one dataset row.'
+        )
+    return _site(indices[0])
+
+
+def closest(key: str, value: str, cutoff: float = 0.6) -> str:
+    """Return the `key` value in the dataset that is most similar to `value`.
+
+    Arabic yeh and kaf in `value` are treated as their Persian equivalents.
+    """
+    values = _index()[1][key]
+    value = value.translate(_normalize)
+    if value in values:
+        return value
+    matches = _get_close_matches(value, values, 1, cutoff)
+    if not matches:
+        raise KeyError(f'no {key} in dataset is similar to {value!r}.')
+    return matches[0]
+
+
+def clear():
+    """Forget the index and the created sites, e.g. after the dataset changes."""
+    _index.cache_clear()
+    _sites.clear()
@@ -0,0 +1,232 @@
+"""A persistent, size-bounded cache for the HTTP responses of fund websites.
+
+The cache is disabled by default. Enable it globally with::
+
+    import iranetf
+    from iranetf.response_cache import HTTPCache
+
+    iranetf.http_cache = HTTPCache()
+
+Responses are stored in an SQLite database keyed on URL and query parameters.
+Each URL is classified into an endpoint kind (see `KINDS`) whose TTL decides
+how long a stored response is served without contacting the server. Expired
+responses that have an ETag or Last-Modified header are revalidated with a
+conditional request. When the database grows beyond `max_size` bytes, the
+least recently used responses are evicted.
+"""
+
+from __future__ import annotations as _
+
+import sqlite3 as _sqlite3
+from pathlib import Path as _Path
+from time import time as _time
+from typing import Any as _Any
+from urllib.parse import urlencode as _urlencode, urlsplit as _urlsplit
+
+from aiohttp import ClientResponse as _ClientResponse
+from multidict import CIMultiDict as _CIMultiDict
+from yarl import URL as _URL
+
+import iranetf
+
+# (url substring, kind); the first matching entry wins.
+KINDS: list[tuple[str, str]] = [
+    ('Fund/GetETFNAV', 'live'),
+    ('Fund/GetLeveragedNAV', 'live'),
+    ('NavLight/', 'live'),
+    ('fundLiveInfo/', 'live'),
+    ('navps/latest', 'live'),
+    ('Chart/TotalNAV', 'history'),
+    ('NavPerShare/', 'history'),
+    ('navPerShare/', 'history'),
+    ('DailyNAVChart/', 'history'),
+    ('dailyNav/', 'history'),
+    ('Profit/', 'history'),
+    ('fundProfits/', 'history'),
+    ('Reports/', 'history'),
+    ('/fund/chart', 'history'),
+    ('assets-chart', 'history'),
+]
+
+# Seconds for which a stored response is fresh. `None` disables caching.
+DEFAULT_TTLS: dict[str, float | None] = {
+    'live': None,
+    'history': 6 * 60 * 60,
+    'home': 24 * 60 * 60,
+    'default': 10 * 60,
+}
+
+
+class CachedResponse:
+    """The subset of `aiohttp.ClientResponse` that iranetf relies on."""
+
+    __slots__ = '_body', 'headers', 'status', 'url'
+
+    def __init__(self, url: str, body: bytes, headers: dict[str, str]):
+        self.url = _URL(url)
+        self.status = 200
+        self.headers = _CIMultiDict(headers)
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        return self._body.decode(encoding)
+
+    async def json(self) -> _Any:
+        return iranetf._loads(self._body)
+
+
+class HTTPCache:
+    __slots__ = '_db', '_size', 'max_size', 'ttls'
+
+    def __init__(
+        self,
+        path: _Path | str | None = None,
+        *,
+        max_size: int = 256 * 1024 * 1024,
+        ttls: dict[str, float | None] | None = None,
+    ):
+        if path is None:
+            path = iranetf._cache_dir() / 'http.sqlite'
+        _Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = db = _sqlite3.connect(path)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, url TEXT, body BLOB, etag TEXT, '
+            'last_modified TEXT, stored REAL, accessed REAL, size INTEGER)'
+        )
+        db.execute(
+            'CREATE INDEX IF NOT EXISTS accessed ON responses (accessed)'
+        )
+        # the running total of the stored sizes, so that stores need no scan
+        self._size: int = db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses'
+        ).fetchone()[0]
+        self.max_size = max_size
+        self.ttls = DEFAULT_TTLS | (ttls or {})
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def kind(url: str) -> str:
+        for substring, kind in KINDS:
+            if substring in url:
+                return kind
+        if _urlsplit(url).path in ('', '/'):
+            return 'home'
+        return 'default'
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        if not params:
+            return url
+        return f'{url}?{_urlencode(sorted(params.items()))}'
+
+    def load(self, key: str) -> tuple | None:
+        """Return (url, body, etag, last_modified, stored) of a stored key."""
+        row = self._db.execute(
+            'SELECT url, body, etag, last_modified, stored '
+            'FROM responses WHERE key = ?',
+            (key,),
+        ).fetchone()
+        if row is not None:
+            with self._db:
+                self._db.execute(
+                    'UPDATE responses SET accessed = ? WHERE key = ?',
+                    (_time(), key),
+                )
+        return row
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        now = _time()
+        db = self._db
+        old = db.execute(
+            'SELECT size FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        with db:
+            db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, body, etag, last_modified, now, now, len(body)),
+            )
+        self._size += len(body) - (0 if old is None else old[0])
+        if self._size > self.max_size:
+            self._evict()
+
+    def touch(self, key: str):
+        """Mark a stored response as fresh, e.g. after a 304 response."""
+        with self._db:
+            self._db.execute(
+                'UPDATE responses SET stored = ? WHERE key = ?', (_time(), key)
+            )
+
+    def clear(self):
+        with self._db:
+            self._db.execute('DELETE FROM responses')
+        self._size = 0
+
+    def size(self) -> int:
+        """Return the total size of the stored bodies in bytes."""
+        return self._size
+
+    def _evict(self):
+        excess = self._size - self.max_size
+        db = self._db
+        evicted = []
+        for key, size in db.execute(
+            'SELECT key, size FROM responses ORDER BY accessed'
+        ):
+            evicted.append((key,))
+            excess -= size
+            self._size -= size
+            if excess <= 0:
+                break
+        with db:
+            db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    async def get(
+        self, url: str, params: dict | None = None, cookies: dict | None = None
+    ) -> _ClientResponse | CachedResponse:
+        ttl = self.ttls[self.kind(url)]
+        if ttl is None or cookies:
+            return await iranetf._request(url, params, cookies)
+
+        key = self.key(url, params)
+        row = self.load(key)
+        headers = {}
+        if row is not None:
+            final_url, body, etag, last_modified, stored = row
+            if _time() - stored < ttl:
+                return CachedResponse(final_url, body, {})
+            if etag is not None:
+                headers['If-None-Match'] = etag
+            if last_modified is not None:
+                headers['If-Modified-Since'] = last_modified
+
+        r = await iranetf._request(url, params, cookies, headers or None)
+        if r.status == 304 and row is not None:
+            self.touch(key)
+            r.release()
+            return CachedResponse(row[0], row[1], dict(r.headers))
+        if r.status == 200:
+            rh = r.headers
+            self.store(
+                key,
+                str(r.url),
+                await r.read(),
+                rh.get('ETag'),
+                rh.get('Last-Modified'),
+            )
+        return r
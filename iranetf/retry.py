@@ -0,0 +1,276 @@
+"""Retry transient HTTP errors with backoff, a circuit breaker, and a budget.
+
+A `RetryPolicy` can wrap any coroutine function, including the methods of
+`iranetf.sites.BaseSite`::
+
+    from iranetf.retry import Failure, RetryPolicy
+
+    policy = RetryPolicy()
+    result = await policy.call(site.live_navps)
+    if isinstance(result, Failure):
+        print(result.error, result.attempts)
+
+Instead of raising, the policy returns a `Failure` describing the last error.
+"""
+
+from __future__ import annotations as _
+
+from asyncio import sleep as _sleep
+from collections.abc import Awaitable as _Awaitable, Callable as _Callable
+from contextvars import ContextVar as _ContextVar
+from email.utils import parsedate_to_datetime as _parsedate_to_datetime
+from functools import wraps as _wraps
+from random import uniform as _uniform
+from time import monotonic as _monotonic, time as _time
+from typing import Any as _Any, Literal as _Literal
+from urllib.parse import urlsplit as _urlsplit
+
+from aiohttp import (
+    ClientConnectorError as _ClientConnectorError,
+    ClientResponseError as _ClientResponseError,
+    ServerDisconnectedError as _ServerDisconnectedError,
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# True while a RetryPolicy whose breaker is None is calling, so that
+# iranetf._request skips iranetf.circuit_breaker
+_breaker_disabled: _ContextVar[bool] = _ContextVar(
+    '_breaker_disabled', default=False
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending requests to a host that keeps failing."""
+
+
+class CircuitBreaker:
+    """Track the consecutive failures of each host.
+
+    After `threshold` consecutive failures the circuit of the host is open
+    and `allow` returns False for `cooldown` seconds. Then a single probe is
+    allowed; its success closes the circuit and its failure reopens it.
+    """
+
+    __slots__ = '_failures', '_opened', '_probes', 'cooldown', 'threshold'
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: dict[str, int] = {}
+        self._opened: dict[str, float] = {}
+        self._probes: dict[str, float] = {}
+
+    def allow(self, host: str) -> bool:
+        opened = self._opened.get(host)
+        if opened is None:
+            return True
+        now = _monotonic()
+        if now - opened < self.cooldown:
+            return False
+        # half-open; a probe that never reported back expires after cooldown
+        probe = self._probes.get(host)
+        if probe is not None and now - probe < self.cooldown:
+            return False
+        self._probes[host] = now
+        return True
+
+    def is_open(self, host: str) -> bool:
+        return host in self._opened
+
+    def success(self, host: str):
+        self._failures.pop(host, None)
+        self._opened.pop(host, None)
+        self._probes.pop(host, None)
+
+    def failure(self, host: str):
+        self._probes.pop(host, None)
+        failures = self._failures[host] = self._failures.get(host, 0) + 1
+        if failures >= self.threshold:
+            self._opened[host] = _monotonic()
+
+
+class Failure:
+    """The result of a call that failed after `attempts` attempts.
+
+    Failures are falsy so that they can be told apart from successful results
+    with a simple truth test.
+    """
+
+    __slots__ = 'attempts', 'elapsed', 'error', 'host'
+
+    def __init__(
+        self, error: BaseException, attempts: int, elapsed: float, host: str
+    ):
+        self.error = error
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.host = host
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return (
+            f'Failure({self.error!r}, attempts={self.attempts}, '
+            f'elapsed={self.elapsed:.2f}, host={self.host!r})'
+        )
+
+
+def _retry_after(error: BaseException) -> float | None:
+    if not isinstance(error, _ClientResponseError) or error.headers is None:
+        return None
+    value = error.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(_parsedate_to_datetime(value).timestamp() - _time(), 0.0)
+    except TypeError, ValueError:
+        return None
+
+
+def _is_transient(error: BaseException) -> bool:
+    if isinstance(error, _ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(
+        error, _ClientConnectorError | _ServerDisconnectedError | TimeoutError
+    )
+
+
+def _host_of(func: _Callable, args: tuple) -> str:
+    # the host of a bound site method, or of the site, url, or domain argument
+    target = getattr(func, '__self__', None)
+    if target is None and args:
+        target = args[0]
+    target = getattr(target, 'url', target)
+    if not isinstance(target, str):
+        return ''
+    return _urlsplit(target).netloc or target
+
+
+class RetryPolicy:
+    """Retry transient errors with exponential backoff and full jitter.
+
+    The n-th retry waits a random time of up to ``base_delay * 2 ** n``
+    seconds, capped at `max_delay`, or as long as the `Retry-After` header of
+    a 429/503 response asks. At most `attempts` attempts are made.
+
+    Retries are limited by a budget: each retry costs one token and each
+    first-attempt success earns `budget_ratio` tokens, up to `budget`. When
+    the budget is exhausted, errors are not retried, so that an outage does
+    not multiply the load on the hosts.
+
+    Hosts whose circuit is open in `breaker` fail fast with
+    `CircuitOpenError`. The default, ``'shared'``, is whatever
+    `iranetf.circuit_breaker` is at the time of each request;
+    `iranetf._request` already consults and updates it, so the policy leaves
+    it to the requests.
+    Use ``breaker=None`` to make the calls of the policy ignore any breaker.
+    """
+
+    __slots__ = (
+        '_tokens',
+        'attempts',
+        'base_delay',
+        'breaker',
+        'budget',
+        'budget_ratio',
+        'max_delay',
+    )
+
+    def __init__(
+        self,
+        *,
+        attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        breaker: CircuitBreaker | _Literal['shared'] | None = 'shared',
+        budget: float = 20.0,
+        budget_ratio: float = 0.2,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.budget = budget
+        self.budget_ratio = budget_ratio
+        self._tokens = budget
+
+    def delay(self, retry: int, error: BaseException) -> float:
+        """Return the seconds to wait before the `retry`-th retry."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return _uniform(0.0, min(self.max_delay, self.base_delay * 2**retry))
+
+    async def call(
+        self, func: _Callable[..., _Awaitable], *args: _Any, **kwargs: _Any
+    ) -> _Any | Failure:
+        """Return ``await func(*args, **kwargs)`` or a `Failure`."""
+        breaker = self.breaker
+        if breaker is None:
+            token = _breaker_disabled.set(True)
+            try:
+                return await self._retry(func, args, kwargs, None)
+            finally:
+                _breaker_disabled.reset(token)
+        if isinstance(breaker, CircuitBreaker):
+            return await self._retry(func, args, kwargs, breaker)
+        # the shared breaker is updated by iranetf._request
+        return await self._retry(func, args, kwargs, None)
+
+    async def _retry(
+        self,
+        func: _Callable[..., _Awaitable],
+        args: tuple,
+        kwargs: dict,
+        breaker: CircuitBreaker | None,
+    ) -> _Any | Failure:
+        host = _host_of(func, args)
+        start = _monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            if breaker is not None and not breaker.allow(host):
+                return Failure(
+                    CircuitOpenError(host),
+                    attempt - 1,
+                    _monotonic() - start,
+                    host,
+                )
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if not _is_transient(e):
+                    if breaker is not None and isinstance(
+                        e, _ClientResponseError
+                    ):
+                        breaker.success(host)  # the host is responsive
+                    return Failure(e, attempt, _monotonic() - start, host)
+                if breaker is not None:
+                    breaker.failure(host)
+                if attempt >= self.attempts or self._tokens < 1.0:
+                    return Failure(e, attempt, _monotonic() - start, host)
+                self._tokens -= 1.0
+                await _sleep(self.delay(attempt - 1, e))
+                continue
+            if breaker is not None:
+                breaker.success(host)
+            if attempt == 1:
+                self._tokens = min(
+                    self.budget, self._tokens + self.budget_ratio
+                )
+            return result
+
+    def __call__(self, func: _Callable[..., _Awaitable]) -> _Callable:
+        """Decorate `func` to be called with this policy."""
+
+        @_wraps(func)
+        async def wrapper(*args: _Any, **kwargs: _Any) -> _Any | Failure:
+            return await self.call(func, *args, **kwargs)
+
+        return wrapper
@@ -1,6 +1,6 @@
 from logging import getLogger
 
-from iranetf.sites._lib import BaseSite, LiveNAVPS
+from iranetf.sites._lib import BaseSite, LiveNAVPS, MultiPortfolio
 from iranetf.sites._mabnadp import MabnaDP2
 from iranetf.sites._rayanhamafza import (
     BaseRayanHamafza,
@@ -30,6 +30,7 @@ __all__ = [
     'LeveragedTadbirPardazLiveNAVPS',
     'LiveNAVPS',
     'MabnaDP2',
+    'MultiPortfolio',
     'RayanHamafza',
     'RayanHamafza2',
     'TPLiveNAVPS',
@@ -1,14 +1,14 @@
 from __future__ import annotations as _
 
 from abc import abstractmethod
-from datetime import datetime
-from json import loads
+from asyncio import Future, Semaphore, ensure_future, gather, shield
+from datetime import date, datetime
+from time import monotonic
 from typing import Any, Protocol, Self, TypedDict, runtime_checkable
 
 import polars as pl
-from jdatetime import date as jdate
 
-from iranetf import RegNoError, _get, logger
+from iranetf import RegNoError, _get, _host, _loads, logger
 
 
 class LiveNAVPS(TypedDict):
@@ -21,13 +21,57 @@ def comma_int(s: str) -> int:
     return int(s.replace(',', ''))
 
 
+# (url, params, cookies) -> the in-flight download of (response, content)
+_in_flight: dict[tuple, Future[tuple[Any, bytes]]] = {}
+# in-flight download -> the number of callers that await it
+_waiters: dict[Future, int] = {}
+
+
+def _freeze(d: dict | None) -> tuple | None:
+    return None if d is None else tuple(sorted(d.items()))
+
+
+async def _download(
+    url: str, params: dict | None, cookies: dict | None
+) -> tuple[Any, bytes]:
+    r = await _get(url, params, cookies)
+    return r, await r.read()
+
+
+async def _fetch(
+    url: str, params: dict | None = None, cookies: dict | None = None
+) -> tuple[Any, bytes]:
+    """Return the response and content of a GET request to `url`.
+
+    Concurrent calls with the same arguments share a single request, which
+    is cancelled when all of its callers are cancelled.
+    """
+    key = url, _freeze(params), _freeze(cookies)
+    try:
+        future = _in_flight[key]
+    except KeyError:
+        future = _in_flight[key] = ensure_future(
+            _download(url, params, cookies)
+        )
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    _waiters[future] = _waiters.get(future, 0) + 1
+    try:
+        # a cancelled caller must not cancel the request for the others
+        return await shield(future)
+    finally:
+        if waiters := _waiters.pop(future) - 1:
+            _waiters[future] = waiters
+        elif not future.done():  # the last caller was cancelled
+            future.cancel()
+
+
 async def _read(url: str) -> bytes:
-    return await (await _get(url)).read()
+    return (await _fetch(url))[1]
 
 
 @runtime_checkable
 class BaseSite(Protocol):
-    __slots__ = '_home_info_cache', 'last_response', 'portfolio_id', 'url'
+    __slots__ = 'last_response', 'portfolio_id', 'url'
 
     _aa_keys: set[str]
 
@@ -58,10 +102,10 @@ class BaseSite(Protocol):
         cookies: dict | None = None,
         df: bool = False,
     ) -> Any:
-        r = await _get(self.url + path, params, cookies)
-        self.last_response = r
-        content = await r.read()
-        j = loads(content)
+        self.last_response, content = await _fetch(
+            self.url + path, params, cookies
+        )
+        j = _loads(content)
         if df is True:
             # Implements the direct LazyFrame instantiation guardrail safely from memory
             return pl.LazyFrame(j, infer_schema_length=None)
@@ -71,30 +115,58 @@ class BaseSite(Protocol):
 
     async def navps_history(self) -> pl.LazyFrame: ...
 
-    async def cache(self) -> float: ...
+    async def navps_history_since(self, from_: date) -> pl.LazyFrame:
+        """Return the NAVPS history from `from_` (inclusive) onwards.
+
+        Sites that can query a date range override this to avoid downloading
+        the whole history.
+        """
+        return (await self.navps_history()).filter(pl.col('date') >= from_)
 
-    _l18_to_site_map: dict
+    async def cache(self) -> float: ...
 
     @classmethod
     def from_l18(cls, l18: str) -> Self:
+        """Return the memoized site of `l18` from `iranetf.registry`."""
+        from iranetf.registry import site
+
+        return site('l18', l18)  # type: ignore
+
+    @classmethod
+    def from_reg_no(cls, reg_no: str, portfolio_id: str | None = None) -> Self:
+        """Return the memoized site of `reg_no` from `iranetf.registry`.
+
+        `portfolio_id` is required for multi-portfolio websites.
         """
-        Loads the dataset into an in-memory dictionary lookup cache on first call,
-        leaving no lingering dataset objects on the class namespace.
+        from iranetf.registry import site
+
+        return site('reg_no', reg_no, portfolio_id)  # type: ignore
+
+    @classmethod
+    def from_ins_code(cls, ins_code: str) -> Self:
+        """Return the memoized site of `ins_code` from `iranetf.registry`."""
+        from iranetf.registry import site
+
+        return site('ins_code', ins_code)  # type: ignore
+
+    @classmethod
+    def from_url_cached(
+        cls, url: str, portfolio_id: str | None = None
+    ) -> Self:
+        """Like `from_url`, but look the url up in the dataset.
+
+        Unlike `from_url`, no request is sent to the website.
         """
-        try:
-            return cls._l18_to_site_map[l18]
-        except KeyError as e:
-            raise KeyError(
-                f"l18 value '{l18}' not found or invalid in dataset."
-            ) from e
-        except AttributeError:
-            from iranetf.dataset import scan_dataset
-
-            df = scan_dataset().select(['l18', 'site']).collect()
-            to_site = cls._l18_to_site_map = dict(
-                zip(df['l18'].to_list(), df['site'].to_list())
-            )
-            return to_site[l18]
+        from iranetf.registry import site
+
+        return site('url', url, portfolio_id)  # type: ignore
+
+    @classmethod
+    def from_name(cls, name: str, cutoff: float = 0.6) -> Self:
+        """Return the site of the fund whose name is most similar to `name`."""
+        from iranetf.registry import closest, site
+
+        return site('name', closest('name', name, cutoff))  # type: ignore
 
     def _check_aa_keys(self, d: dict):
         if d.keys() <= self._aa_keys:
@@ -104,32 +176,26 @@ class BaseSite(Protocol):
         )
 
     @staticmethod
-    async def from_url(url: str):
-        from iranetf import sites
-
-        content = await _read(url)
-        rfind = content.rfind
+    async def from_url(url: str) -> BaseSite:
+        """Detect the type of the website at `url` and return a site for it.
 
-        if rfind(b'<div class="tadbirLogo"></div>') != -1:
-            tp_site = sites.TadbirPardaz(url)
-            info = await tp_site.home_info()
-            if info['isLeveragedMode']:
-                return sites.LeveragedTadbirPardaz(url)
-            if info['isETFMultiNavMode']:
-                return sites.TadbirPardazMultiNAV(url, '2')
-            return tp_site
-
-        if rfind(b'<!-- Rayanhamafza Front-End Team -->') != -1:
-            return sites.RayanHamafza2(url)
-
-        if rfind(b'Rayan Ham Afza') != -1:
-            return sites.RayanHamafza(url)
-
-        if rfind(b'://mabnadp.com') != -1:
-            assert rfind(rb'/api/v2') != -1, 'Unknown MabnaDP site type.'
-            return sites.MabnaDP2(url)
-
-        raise ValueError(f'Could not determine site type for {url}.')
+        Detection results are cached per host for `_detected_sites.ttl`
+        seconds. A home page downloaded for detection is also used to seed the
+        `home_info` cache of the website.
+        """
+        host = _host(url)
+        try:
+            site_type, portfolio_id = _detected_sites[host]
+            home_info = None
+        except KeyError:
+            site_type, portfolio_id, home_info = _detect_site_type(
+                url, await _read(url)
+            )
+            _detected_sites[host] = site_type, portfolio_id
+        site = site_type(url, portfolio_id) if portfolio_id else site_type(url)
+        if home_info is not None:  # only a fresh download is worth caching
+            _home_infos[site._home_info_key] = home_info
+        return site
 
     async def leverage(self) -> float:
         return 1.0 - await self.cache()
@@ -137,16 +203,35 @@ class BaseSite(Protocol):
     async def _home(self) -> str:
         return (await _read(self.url)).decode()
 
+    @staticmethod
     @abstractmethod
-    async def _home_info(self) -> dict[str, Any]: ...
+    def _parse_home_info(html: str) -> dict[str, Any]: ...
+
+    async def _home_info(self) -> dict[str, Any]:
+        return self._parse_home_info(await self._home())
+
+    @property
+    def _home_info_key(self) -> tuple:
+        # all portfolios of a website share the same home page
+        return self._parse_home_info, self.url
 
     async def home_info(self) -> dict[str, Any]:
+        """Return the parsed home page of the website.
+
+        The result is shared by all the portfolios of the website and is
+        cached for `_home_infos.ttl` seconds, see `clear_home_info`.
+        """
+        key = self._home_info_key
         try:
-            return self._home_info_cache
-        except AttributeError:
-            i = self._home_info_cache = await self._home_info()
+            return _home_infos[key]
+        except KeyError:
+            i = _home_infos[key] = await self._home_info()
             return i
 
+    def clear_home_info(self):
+        """Forget the cached `home_info` of the website."""
+        _home_infos.pop(self._home_info_key)
+
     async def reg_no(self) -> str: ...
 
     async def portfolios(self) -> dict[str, str]:
@@ -154,6 +239,141 @@ class BaseSite(Protocol):
         ...
 
 
+class MultiPortfolio:
+    """All the portfolios of a multi-portfolio website.
+
+    The portfolios are discovered once using `site.portfolios()`. Each method
+    calls the same method of every portfolio concurrently, at most
+    `concurrency` at a time, and combines the results with a `portfolio_id`
+    column.
+    """
+
+    __slots__ = '_sites', 'concurrency', 'site'
+
+    def __init__(self, site: BaseSite, concurrency: int = 4):
+        self.site = site
+        self.concurrency = concurrency
+        self._sites: dict[str, BaseSite] | None = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.site!r})'
+
+    async def sites(self) -> dict[str, BaseSite]:
+        """Return a dict mapping portfolio id to the site of the portfolio."""
+        if (sites := self._sites) is None:
+            site = self.site
+            site_type = type(site)
+            sites = self._sites = {
+                (pid := str(portfolio_id)): site_type(site.url, pid)
+                for portfolio_id in await site.portfolios()
+            }
+        return sites
+
+    async def _gather(self, method: str) -> dict[str, Any]:
+        sites = await self.sites()
+        semaphore = Semaphore(self.concurrency)
+
+        async def call(site: BaseSite):
+            async with semaphore:
+                return await getattr(site, method)()
+
+        results = await gather(*[call(site) for site in sites.values()])
+        return dict(zip(sites, results))
+
+    async def live_navps(self) -> pl.DataFrame:
+        results = await self._gather('live_navps')
+        return pl.DataFrame(
+            [{'portfolio_id': k} | v for k, v in results.items()],
+            schema={
+                'portfolio_id': pl.String,
+                'creation': pl.Int64,
+                'redemption': pl.Int64,
+                'date': pl.Datetime,
+            },
+        )
+
+    async def asset_allocation(self) -> pl.DataFrame:
+        results = await self._gather('asset_allocation')
+        return pl.DataFrame(
+            [{'portfolio_id': k} | v for k, v in results.items()],
+            infer_schema_length=None,
+        )
+
+    async def navps_history(self) -> pl.LazyFrame:
+        results = await self._gather('navps_history')
+        if not results:
+            return pl.LazyFrame(schema={'portfolio_id': pl.String})
+        return pl.concat(
+            [
+                lf.with_columns(portfolio_id=pl.lit(k))
+                for k, lf in results.items()
+            ],
+            how='diagonal_relaxed',
+        )
+
+
+class _TTLCache:
+    """A mapping whose items expire `ttl` seconds after being set."""
+
+    __slots__ = '_data', 'ttl'
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._data: dict = {}
+
+    def __getitem__(self, key):
+        expires, value = self._data[key]
+        if expires < monotonic():
+            del self._data[key]
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = (monotonic() + self.ttl, value)
+
+    def pop(self, key, default=None):
+        try:
+            return self._data.pop(key)[1]
+        except KeyError:
+            return default
+
+    def clear(self):
+        self._data.clear()
+
+
+# host -> (site type, portfolio_id)
+_detected_sites = _TTLCache(60 * 60)
+# (_parse_home_info, url) -> home_info
+_home_infos = _TTLCache(60 * 60)
+
+
+def _detect_site_type(
+    url: str, content: bytes
+) -> tuple[type[BaseSite], str, dict[str, Any]]:
+    from iranetf import sites
+
+    rfind = content.rfind
+
+    if rfind(b'<div class="tadbirLogo"></div>') != -1:
+        info = sites.BaseTadbirPardaz._parse_home_info(content.decode())
+        if info['isLeveragedMode']:
+            return sites.LeveragedTadbirPardaz, '', info
+        if info['isETFMultiNavMode']:
+            return sites.TadbirPardazMultiNAV, '2', info
+        return sites.TadbirPardaz, '', info
+
+    if rfind(b'<!-- Rayanhamafza Front-End Team -->') != -1:
+        site_type = sites.RayanHamafza2
+    elif rfind(b'Rayan Ham Afza') != -1:
+        site_type = sites.RayanHamafza
+    elif rfind(b'://mabnadp.com') != -1:
+        assert rfind(rb'/api/v2') != -1, 'Unknown MabnaDP site type.'
+        site_type = sites.MabnaDP2
+    else:
+        raise ValueError(f'Could not determine site type for {url}.')
+    return site_type, '', site_type._parse_home_info(content.decode())
+
+
 async def reg_no_from_home_info(self: BaseSite) -> str:
     home_info = await self.home_info()
     try:
@@ -162,8 +382,63 @@ async def reg_no_from_home_info(self: BaseSite) -> str:
         raise RegNoError('"seo_reg_no" not found in home_info') from None
 
 
-def _jymd_to_greg(date_string: str | None) -> Any:
-    if date_string is None:
-        return None
-    y, m, d = [int(i) for i in date_string.split('/')]
-    return jdate(y, m, d).togregorian()
+_FA_DIGITS = {
+    '۰': '0',
+    '۱': '1',
+    '۲': '2',
+    '۳': '3',
+    '۴': '4',
+    '۵': '5',
+    '۶': '6',
+    '۷': '7',
+    '۸': '8',
+    '۹': '9',
+}
+
+_FA_NUMERIC = _FA_DIGITS | {',': ''}
+
+_ARABIC_TO_PERSIAN = {'ي': 'ی', 'ك': 'ک'}
+
+
+def _clean_persian_numeric_expr(column_name: str) -> pl.Expr:
+    """
+    Returns a Polars expression that strips Persian numerals and commas
+    from a string column in a single pass, then casts it to Float64.
+    """
+    return (
+        pl.col(column_name)
+        .str.strip_chars()
+        .str.replace_many(_FA_NUMERIC)
+        .cast(pl.Float64)
+    )
+
+
+# days from 1600-01-01, the epoch of jdatetime's algorithm, to 1970-01-01
+_EPOCH_OFFSET = 135_140
+
+
+def _jymd_to_greg(expr: pl.Expr) -> pl.Expr:
+    """Convert Jalali `Y/M/D` strings to `pl.Date`.
+
+    This is a vectorized form of the arithmetic that jdatetime uses.
+    Persian digits are accepted and nulls are propagated.
+    """
+    ymd = (
+        expr.str.strip_chars()
+        .str.replace_many(_FA_DIGITS)
+        .str.split_exact('/', 2)
+        .struct
+    )
+    # years since 979 AP, whose 1/1 is 79 days (78 + d) after the epoch
+    jy = ymd.field('field_0').cast(pl.Int32) - 979
+    m = ymd.field('field_1').cast(pl.Int32)
+    d = ymd.field('field_2').cast(pl.Int32)
+    days = (
+        365 * jy
+        + jy // 33 * 8
+        + (jy % 33 + 3) // 4
+        + pl.when(m <= 7).then(31 * (m - 1)).otherwise(30 * m - 24)
+        + d
+        + (78 - _EPOCH_OFFSET)
+    )
+    return pl.from_epoch(days, time_unit='d')
@@ -1,7 +1,7 @@
 from asyncio import gather
+from collections.abc import Iterator, Mapping
 from datetime import datetime
-from json import loads
-from re import search
+from re import MULTILINE, compile, search
 from typing import Any
 
 import polars as pl
@@ -9,10 +9,41 @@ import polars as pl
 from iranetf.sites._lib import (
     BaseSite,
     LiveNAVPS,
-    _get,
+    _loads,
+    _TTLCache,
     reg_no_from_home_info,
 )
 
+# window.__NAME__ = "<JSON encoded as a JSON string>";
+_WINDOW_STATE = compile(r'^\s*window\.(__\w+__) = (".*?");?\s*$', MULTILINE)
+
+
+class _HomeData(Mapping[str, Any]):
+    """The `window.__NAME__` states of a home page, decoded on first access."""
+
+    __slots__ = '_decoded', '_raw'
+
+    def __init__(self, html: str):
+        self._raw = {m[1]: m[2] for m in _WINDOW_STATE.finditer(html)}
+        self._decoded: dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._decoded[key]
+        except KeyError:
+            value = self._decoded[key] = _loads(_loads(self._raw[key]))
+            return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+
+# url -> _HomeData
+_home_datas = _TTLCache(5 * 60)
+
 
 # Uses api/v2/ path instead of api/v1/
 class MabnaDP2(BaseSite):
@@ -20,9 +51,9 @@ class MabnaDP2(BaseSite):
         assert portfolio_id
         super().__init__(url, portfolio_id=portfolio_id)
 
-    async def _home_info(self):
+    @staticmethod
+    def _parse_home_info(html: str) -> dict[str, Any]:
         d = {}
-        html = await self._home()
         m = search(r'(\d+)\s*نزد سازمان بورس', html)
         if m:
             d['seo_reg_no'] = m[1]
@@ -105,39 +136,29 @@ class MabnaDP2(BaseSite):
         g = aa.get
         return sum(g(k, 0.0) for k in ('اوراق', 'وجه نقد', 'سپرده بانکی'))
 
-    async def home_data(self) -> dict:
-        html = await (await _get(self.url)).text()
-        return {
-            '__REACT_QUERY_STATE__': loads(
-                loads(
-                    html.rpartition('window.__REACT_QUERY_STATE__ = ')[
-                        2
-                    ].partition(';\n')[0]
-                )
-            ),
-            '__REACT_REDUX_STATE__': loads(
-                loads(
-                    html.rpartition('window.__REACT_REDUX_STATE__ = ')[
-                        2
-                    ].partition(';\n')[0]
-                )
-            ),
-            '__ENV__': loads(
-                loads(
-                    html.rpartition('window.__ENV__ = ')[2].partition('\n')[0]
-                )
-            ),
-        }
+    async def home_data(self) -> Mapping[str, Any]:
+        """Return the states that the home page assigns to `window`.
+
+        e.g. `__REACT_QUERY_STATE__`, `__REACT_REDUX_STATE__`, and `__ENV__`.
+        Each state is only decoded when it is accessed. The result is shared
+        by all portfolios of the website for `_home_datas.ttl` seconds.
+        """
+        url = self.url
+        try:
+            return _home_datas[url]
+        except KeyError:
+            data = _home_datas[url] = _HomeData(await self._home())
+            return data
 
     async def leverage(self) -> float:
         data, cache = await gather(self.home_data(), self.cache())
         genera_data = data['__REACT_REDUX_STATE__']['general']['data']
         if not genera_data['isLeverage']:
             return 1.0 - cache
-        data: dict = data['__REACT_QUERY_STATE__']['queries'][9]['state'][
-            'data'
-        ]
-        first = data[next(iter(data))]
+        query_data: dict = data['__REACT_QUERY_STATE__']['queries'][9][
+            'state'
+        ]['data']
+        first = query_data[next(iter(query_data))]
         return (
             1.0
             + first['commonUnitRedemptionValueAmount']
@@ -70,9 +70,7 @@ class BaseRayanHamafza(BaseSite):
         # between RayanHamafza and RayanHamafza2 JSON payloads.
         return lf.select(
             [
-                pl.nth(0)
-                .map_elements(_jymd_to_greg, return_dtype=pl.Date)
-                .alias('date'),
+                _jymd_to_greg(pl.nth(0)).alias('date'),
                 pl.nth(1).alias('creation'),
                 pl.nth(2).alias('redemption'),
                 pl.nth(3).alias('statistical'),
@@ -87,9 +85,7 @@ class BaseRayanHamafza(BaseSite):
         return lf.select(
             [
                 pl.col('column_0').alias('nav'),
-                pl.col('column_1')
-                .map_elements(_jymd_to_greg, return_dtype=pl.Date)
-                .alias('date'),
+                _jymd_to_greg(pl.col('column_1')).alias('date'),
                 pl.col('column_2').alias('creation_navps'),
             ]
         )
@@ -126,12 +122,7 @@ class BaseRayanHamafza(BaseSite):
                 {col: col[0].lower() + col[1:] for col in schema.names()}
             )
         return lf.with_columns(
-            pl.col('profitDate')
-            .map_elements(
-                lambda i: _jymd_to_greg(i) if i is not None else None,
-                return_dtype=pl.Date,
-            )
-            .alias('date')
+            _jymd_to_greg(pl.col('profitDate')).alias('date')
         )
 
     async def cache(self) -> float:
@@ -175,8 +166,8 @@ class RayanHamafza(BaseRayanHamafza):
             ).togregorian(),
         }
 
-    async def _home_info(self) -> dict[str, Any]:
-        html = await self._home()
+    @staticmethod
+    def _parse_home_info(html: str) -> dict[str, Any]:
         d = {}
         reg_no_match = search(r'ثبت شده به شماره (\d+) نزد سازمان بورس', html)
         if reg_no_match:
@@ -228,8 +219,8 @@ class FundItem(TypedDict):
 class RayanHamafza2(BaseRayanHamafza):
     __slots__ = ()
 
-    async def _home_info(self) -> dict[str, Any]:
-        html = await self._home()
+    @staticmethod
+    def _parse_home_info(html: str) -> dict[str, Any]:
         return {'title': html.partition('<title>')[2].partition('</title>')[0]}
 
     _api_path = 'api/v1/'
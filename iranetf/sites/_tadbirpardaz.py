@@ -1,52 +1,154 @@
-from asyncio import gather
-from datetime import date
-from json import loads
-from re import findall, search, split
-from typing import Any
+from asyncio import Semaphore, gather
+from collections.abc import Iterable
+from datetime import date, datetime, time
+from re import compile, findall, search
+from typing import Any, get_type_hints
 
 import polars as pl
 from jdatetime import date as jdate, datetime as jdatetime
 
-from iranetf import _get
+from iranetf import _get, _loads
 from iranetf.sites._lib import (
+    _FA_DIGITS,
+    _FA_NUMERIC,
     BaseSite,
     LiveNAVPS,
+    _clean_persian_numeric_expr,
     _jymd_to_greg,
     comma_int,
     reg_no_from_home_info,
 )
 
-# Optimized vector replacement map for stripping Persian characters
-_FA_TO_EN_REPLACEMENTS = {
-    '۰': '0',
-    '۱': '1',
-    '۲': '2',
-    '۳': '3',
-    '۴': '4',
-    '۵': '5',
-    '۶': '6',
-    '۷': '7',
-    '۸': '8',
-    '۹': '9',
-    ',': '',
-}
-
-
-def _clean_persian_numeric_expr(column_name: str) -> pl.Expr:
-    """
-    Returns a Polars expression that strips Persian numerals and commas
-    from a string column, then casts it to Float64 natively.
+
+def _last_page(html: str) -> int:
+    """Return the largest page number linked from the pager of a report."""
+    pager = html.rpartition('</tbody>')[2]
+    return max((int(p) for p in findall(r'[?&]page=(\d+)"', pager)), default=1)
+
+
+# the end of the string ends the last row of a page truncated before </tbody>
+_CELL_OR_ROW_END = compile(r'<td>([^<]*)</td>|</tr>\s*<tr>|</tbody>|\Z')
+
+
+def _table_columns(pages: list[str], width: int) -> list[list[str]]:
+    """Return the cells of the `<tbody>` of all `pages` as `width` columns.
+
+    The rows are read in a single pass over each page, straight into the
+    column lists. Short rows are padded with '' and long rows are truncated.
     """
-    expr = pl.col(column_name).str.strip_chars()
-    for fa_char, en_char in _FA_TO_EN_REPLACEMENTS.items():
-        expr = expr.str.replace_all(fa_char, en_char)
-    return expr.cast(pl.Float64)
+    columns: list[list[str]] = [[] for _ in range(width)]
+    for html in pages:
+        if (start := html.find('<tbody>')) == -1:
+            continue
+        i = 0  # the index of the next cell in the current row
+        for m in _CELL_OR_ROW_END.finditer(html, start):
+            cell = m[1]
+            if cell is not None:
+                if i < width:
+                    columns[i].append(cell)
+                i += 1
+                continue
+            # the end of a row
+            if 0 < i < width:
+                for column in columns[i:]:
+                    column.append('')
+            i = 0
+            if m[0] == '</tbody>':
+                break
+    return columns
 
 
 def _comma_float(s: str) -> float:
     return float(s.replace(',', ''))
 
 
+def _parse_publish_date(s: str) -> datetime:
+    try:
+        parsed_date = jdatetime.strptime(s, '%Y/%m/%d %H:%M:%S')
+    except ValueError:
+        parsed_date = jdatetime.strptime(s, '%Y/%m/%d ')
+    return parsed_date.togregorian()
+
+
+def _publish_date_expr(column: str) -> pl.Expr:
+    # vectorized _parse_publish_date
+    parts = pl.col(column).str.strip_chars().str.split_exact(' ', 1).struct
+    return _jymd_to_greg(parts.field('field_0')).dt.combine(
+        parts.field('field_1')
+        .str.replace_many(_FA_DIGITS)
+        .str.to_time('%H:%M:%S', strict=False)
+        .fill_null(time())
+    )
+
+
+_CONVERTERS = {int: comma_int, float: _comma_float}
+_DTYPES = {int: pl.Int64, float: pl.Float64}
+
+
+class _LiveNAVPSConverter:
+    """Convert the raw live NAVPS responses of an endpoint.
+
+    The fields are resolved once from `typed_dict`; `renames` maps raw keys
+    to the keys of `typed_dict`. Raw keys that are not in `typed_dict` are
+    converted to `default`.
+    """
+
+    __slots__ = '_date_key', '_default', '_fields'
+
+    def __init__(
+        self,
+        typed_dict: type,
+        renames: dict[str, str],
+        date_key: str,
+        default: type = str,
+    ):
+        annotations = get_type_hints(typed_dict)
+        self._date_key = date_key
+        self._default = default
+        # raw key -> (key, type)
+        self._fields: dict[str, tuple[str, type]] = {
+            raw: (key, annotations[key]) for raw, key in renames.items()
+        } | {
+            key: (key, t)
+            for key, t in annotations.items()
+            if key not in renames.values() and key != 'date'
+        }
+
+    def __call__(self, raw: dict) -> dict:
+        fields = self._fields
+        default = self._default
+        d = {}
+        for raw_key, value in raw.items():
+            if raw_key == self._date_key:
+                d['date'] = _parse_publish_date(value)
+                continue
+            key, t = fields.get(raw_key) or (raw_key, default)
+            d[key] = (
+                _CONVERTERS[t](value)
+                if t in _CONVERTERS and value is not None
+                else value
+            )
+        return d
+
+    def frame(self, raws: list[dict]) -> pl.DataFrame:
+        """Convert many raw responses at once into a typed DataFrame."""
+        df = pl.DataFrame(raws, infer_schema_length=None)
+        fields = self._fields
+        default = self._default
+        columns = []
+        for raw_key in df.columns:
+            if raw_key == self._date_key:
+                columns.append(_publish_date_expr(raw_key).alias('date'))
+                continue
+            key, t = fields.get(raw_key) or (raw_key, default)
+            expr = pl.col(raw_key)
+            if (dtype := _DTYPES.get(t)) is not None:
+                expr = expr.cast(pl.String).str.replace_many(_FA_NUMERIC)
+                expr = expr.cast(dtype)
+            columns.append(expr.alias(key))
+        return df.select(columns)
+
+
 class TPLiveNAVPS(LiveNAVPS):
     dailyTotalNetAssetValue: int
     dailyTotalUnit: int
@@ -91,8 +193,8 @@ class BaseTadbirPardaz(BaseSite):
         self._check_aa_keys(d)
         return d
 
-    async def _home_info(self) -> dict[str, Any]:
-        html = await self._home()
+    @staticmethod
+    def _parse_home_info(html: str) -> dict[str, Any]:
         d: dict[str, Any] = {
             'isETFMultiNavMode': search(r'isETFMultiNavMode\s*=\s*true;', html)
             is not None,
@@ -131,32 +233,49 @@ class BaseTadbirPardaz(BaseSite):
             + g('اوراق مشارکت', 0.0)
         )
 
-    async def nav_history(
-        self, *, from_: date = date(1970, 1, 1), to: date, basket_id=0
-    ) -> pl.LazyFrame:
-        """
-        Fetches historical NAV raw matrix blocks via automated page streaming loops.
-        """
-        path = f'Reports/FundNAVList?FromDate={jdatetime.fromgregorian(date=from_):%Y/%m/%d}&ToDate={jdatetime.fromgregorian(date=to):%Y/%m/%d}&BasketId={basket_id}&page=1'
-        all_pages_data = []
-
-        while True:
-            r = await _get(self.url + path)
-            html = (await r.read()).decode()
+    async def _report_pages(
+        self, path: str, params: dict, concurrency: int
+    ) -> list[str]:
+        """Return the HTML of all the pages of a paginated report in order.
 
-            table_body = html.partition('<tbody>')[2].partition('</tbody>')[0]
-            rows = split(r'</tr>\s*<tr>', table_body)
+        The page count is read from the pager of the first page and the rest
+        of the pages are fetched concurrently, at most `concurrency` at a time.
+        Pagers that only show a window of pages are followed window by window.
+        """
+        semaphore = Semaphore(concurrency)
 
-            for row in rows:
-                cells = findall(r'<td>([^<]*)</td>', row)
-                if cells:
-                    all_pages_data.append(cells)
+        async def page(n: int) -> str:
+            async with semaphore:
+                r = await _get(self.url + path, params | {'page': n})
+                return (await r.read()).decode()
 
-            m = search('<a href="([^"]*)" title="Next page">»</a>', html)
-            if m is None:
-                break
-            path = m[1]
+        pages = [await page(1)]
+        while (last := _last_page(pages[-1])) > len(pages):
+            pages += await gather(
+                *[page(n) for n in range(len(pages) + 1, last + 1)]
+            )
+        return pages
 
+    async def nav_history(
+        self,
+        *,
+        from_: date = date(1970, 1, 1),
+        to: date,
+        basket_id: int | str = 0,
+        concurrency: int = 4,
+    ) -> pl.LazyFrame:
+        """
+        Fetches historical NAV raw matrix blocks of all the report pages.
+        """
+        pages = await self._report_pages(
+            'Reports/FundNAVList',
+            {
+                'FromDate': f'{jdatetime.fromgregorian(date=from_):%Y/%m/%d}',
+                'ToDate': f'{jdatetime.fromgregorian(date=to):%Y/%m/%d}',
+                'BasketId': basket_id,
+            },
+            concurrency,
+        )
         ordered_columns = [
             'Row',
             'Date',
@@ -181,23 +300,18 @@ class BaseTadbirPardaz(BaseSite):
             'Number of Normal Unit Investors',
         ]
 
-        target_len = len(ordered_columns)
-        cleaned_rows = []
-
-        for row in all_pages_data:
-            if len(row) < target_len:
-                # Safe text-padding boundary alignment
-                padded_row = row + [''] * (target_len - len(row))
-                cleaned_rows.append(padded_row)
-            else:
-                cleaned_rows.append(row[:target_len])
-
-        if not cleaned_rows:
+        columns = _table_columns(pages, len(ordered_columns))
+        if not columns[0]:
             return pl.LazyFrame(
-                [], schema={col: pl.String for col in ordered_columns}
+                [],
+                schema={col: pl.String for col in ordered_columns}
+                | {'date': pl.Date},
             )
 
-        lf = pl.LazyFrame(cleaned_rows, schema=ordered_columns, orient='row')
+        lf = pl.LazyFrame(
+            dict(zip(ordered_columns, columns)),
+            schema={col: pl.String for col in ordered_columns},
+        )
 
         numeric_cols = [col for col in ordered_columns if col != 'Date']
 
@@ -219,43 +333,42 @@ class BaseTadbirPardaz(BaseSite):
                 _clean_persian_numeric_expr(col).alias(col)
                 for col in numeric_cols
             ]
-            + [
-                pl.col('Date')
-                .map_elements(_jymd_to_greg, return_dtype=pl.Date)
-                .alias('date')
-            ]
+            + [_jymd_to_greg(pl.col('Date')).alias('date')]
         )
 
     async def portfolios(self) -> dict[str, str]:
         home_info = await self.home_info()
         if home_info['isETFMultiNavMode']:
-            baskets = home_info['basketIDs']
-            baskets.pop('1', None)
-            return baskets
+            return {
+                k: v for k, v in home_info['basketIDs'].items() if k != '1'
+            }
         return {'1': self.url}
 
 
 class TadbirPardaz(BaseTadbirPardaz):
+    _live_navps = _LiveNAVPSConverter(
+        TPLiveNAVPS,
+        {
+            'subNav': 'creation',
+            'cancelNav': 'redemption',
+            'esmiNav': 'nominal',
+        },
+        'publishDate',
+    )
+
     async def live_navps(self) -> TPLiveNAVPS:
         d_raw: str = await self._json('Fund/GetETFNAV')
-        d: dict = loads(d_raw)
-
-        d['creation'] = d.pop('subNav')
-        d['redemption'] = d.pop('cancelNav')
-        d['nominal'] = d.pop('esmiNav')
-
-        for k, t in TPLiveNAVPS.__annotations__.items():
-            if t is int and k in d:
-                d[k] = comma_int(d[k])
+        return self._live_navps(_loads(d_raw))  # type: ignore
 
-        date_str = d.pop('publishDate')
-        try:
-            parsed_date = jdatetime.strptime(date_str, '%Y/%m/%d %H:%M:%S')
-        except ValueError:
-            parsed_date = jdatetime.strptime(date_str, '%Y/%m/%d ')
-        d['date'] = parsed_date.togregorian()
+    @classmethod
+    def live_navps_frame(cls, raws: Iterable[str | dict]) -> pl.DataFrame:
+        """Convert many raw `Fund/GetETFNAV` responses into one DataFrame.
 
-        return d  # type: ignore
+        The columns are the keys of `live_navps` with the same types.
+        """
+        return cls._live_navps.frame(
+            [_loads(r) if isinstance(r, str) else r for r in raws]
+        )
 
     async def navps_history(self) -> pl.LazyFrame:
         j: list = await self._json(
@@ -280,13 +393,31 @@ class TadbirPardaz(BaseTadbirPardaz):
             },
         ).with_columns(pl.col('date').str.to_date('%m/%d/%Y'))
 
+    async def navps_history_since(self, from_: date) -> pl.LazyFrame:
+        lf = await self.nav_history(
+            from_=from_, to=date.today(), basket_id=self.portfolio_id or 0
+        )
+        return lf.select(
+            'date',
+            pl.col('Issue Price').alias('creation'),
+            pl.col('Redemption Price').alias('redemption'),
+            pl.col('Statistical Price').alias('statistical'),
+        )
+
     async def dividend_history(
         self,
         *,
         from_date: date | str | None = None,
         to_date: date | str | None = None,
+        concurrency: int = 4,
     ) -> pl.LazyFrame:
-        params: dict = {'page': 1}
+        """Return the dividend history of the fund.
+
+        All the report pages after the first one are fetched concurrently,
+        at most `concurrency` at a time. Use `concurrency=1` to fetch them
+        one by one.
+        """
+        params: dict = {}
         if from_date is not None:
             if isinstance(from_date, date):
                 jd = jdate.fromgregorian(date=from_date)
@@ -298,43 +429,23 @@ class TadbirPardaz(BaseTadbirPardaz):
                 to_date = f'{jd.year}/{jd.month}/{jd.day}'
             params['toDate'] = to_date
 
-        all_rows = []
-        while True:
-            html = (
-                await (
-                    await _get(
-                        f'{self.url}Reports/FundDividendProfitReport',
-                        params=params,
-                    )
-                ).read()
-            ).decode()
-            table, _, after_table = html.partition('<tbody>')[2].rpartition(
-                '</tbody>'
-            )
-
-            for r in split(r'</tr>\s*<tr>', table):
-                cells = findall(r'<td>([^<]*)</td>', r)
-                if cells:
-                    all_rows.append(cells)
-
-            if '" title="Next page">' not in after_table:
-                break
-            params['page'] += 1
-
-        if not all_rows or not all_rows[0]:
+        pages = await self._report_pages(
+            'Reports/FundDividendProfitReport', params, concurrency
+        )
+        names = (
+            'row',
+            'date',
+            'fundUnit',
+            'unitProfit',
+            'sumAllProfit',
+            'profitPercent',
+        )
+        columns = _table_columns(pages, len(names))
+        if not columns[0]:
             return pl.LazyFrame([], schema={'date': pl.Date})
 
         lf = pl.LazyFrame(
-            all_rows,
-            schema=[
-                'row',
-                'date',
-                'fundUnit',
-                'unitProfit',
-                'sumAllProfit',
-                'profitPercent',
-            ],
-            orient='row',
+            dict(zip(names, columns)), schema=dict.fromkeys(names, pl.String)
         )
 
         lf = lf.with_columns(
@@ -344,9 +455,7 @@ class TadbirPardaz(BaseTadbirPardaz):
         # Vectorized translation expressions replacing map/apply configurations
         return lf.lazy().with_columns(
             [
-                pl.col('date').map_elements(
-                    _jymd_to_greg, return_dtype=pl.Date
-                ),
+                _jymd_to_greg(pl.col('date')).alias('date'),
                 _clean_persian_numeric_expr('fundUnit').cast(pl.Int64),
                 _clean_persian_numeric_expr('sumAllProfit').cast(pl.Int64),
                 _clean_persian_numeric_expr('row').cast(pl.Int64),
@@ -373,82 +482,97 @@ class LeveragedTadbirPardazLiveNAVPS(LiveNAVPS):
     SuperUnitsTotalNetAssetValue: float
 
 
-class LeveragedTadbirPardaz(BaseTadbirPardaz):
-    async def navps_history(self) -> pl.LazyFrame:
-        j: list = await self._json(
-            'Chart/TotalNAV', params={'type': 'getnavtotal'}
-        )
+_LEVERAGED_NAVPS_NAMES = (
+    'normal_creation',
+    'normal_statistical',
+    'normal_redemption',
+    'creation',
+    'redemption',
+    'normal',
+)
 
-        names = (
-            'normal_creation',
-            'normal_statistical',
-            'normal_redemption',
-            'creation',
-            'redemption',
-            'normal',
-        )
 
-        combined_df: pl.LazyFrame | None = None
-
-        for i, name in zip(j, names):
-            # Parse record tracks efficiently using native dataframe allocations
-            lf = (
-                pl.LazyFrame(i['List'])
-                .select(
-                    [
-                        pl.col('x')
-                        .str.to_date('%m/%d/%Y', strict=False)
-                        .alias('date'),
-                        pl.col('y').cast(pl.Float64).alias(name),
-                    ]
-                )
-                .unique(subset=['date'])
-            )
+def _leveraged_navps_history(j: list[dict]) -> pl.LazyFrame:
+    """Combine the chart series of a leveraged fund into one frame.
 
-            if combined_df is None:
-                combined_df = lf
-            else:
-                combined_df = combined_df.join(
-                    lf, on='date', how='full', coalesce=True
-                )
+    The series usually share the same dates, in which case their values are
+    used as columns directly. Otherwise they are stacked and pivoted by date.
+    """
+    if not j:
+        return pl.LazyFrame(
+            schema={'date': pl.Date}
+            | dict.fromkeys(_LEVERAGED_NAVPS_NAMES, pl.Float64)
+        )
+    names = _LEVERAGED_NAVPS_NAMES[: len(j)]
+    points = [i['List'] for i in j[: len(names)]]
+    xs = [[p['x'] for p in ps] for ps in points]
+    schema = {'x': pl.String} | dict.fromkeys(names, pl.Float64)
+    if all(x == xs[0] for x in xs[1:]):
+        lf = pl.LazyFrame(
+            {'x': xs[0]}
+            | {n: [p['y'] for p in ps] for n, ps in zip(names, points)},
+            schema=schema,
+        )
+    else:
+        lf = (
+            pl.LazyFrame(
+                {
+                    'series': [n for n, x in zip(names, xs) for _ in x],
+                    'x': [x for x_ in xs for x in x_],
+                    'y': [p['y'] for ps in points for p in ps],
+                },
+                schema={'series': pl.String, 'x': pl.String, 'y': pl.Float64},
+            )
+            .pivot(
+                'series',
+                on_columns=names,
+                index='x',
+                values='y',
+                aggregate_function='first',
+            )
+            .cast(schema)  # type: ignore
+        )
+    return (
+        lf.select(
+            pl.col('x').str.to_date('%m/%d/%Y', strict=False).alias('date'),
+            *names,
+        )
+        .drop_nulls('date')
+        .unique('date', keep='first')
+        .sort('date')
+    )
 
-        if combined_df is None:
-            # Return empty LazyFrame with proper schema
-            schema: dict = {'date': pl.Date}
-            for name in names:
-                schema[name] = pl.Float64
-            return pl.LazyFrame(schema=schema)
 
-        return combined_df
+class LeveragedTadbirPardaz(BaseTadbirPardaz):
+    async def navps_history(self) -> pl.LazyFrame:
+        j: list = await self._json(
+            'Chart/TotalNAV', params={'type': 'getnavtotal'}
+        )
+        return _leveraged_navps_history(j)
+
+    _live_navps = _LiveNAVPSConverter(
+        LeveragedTadbirPardazLiveNAVPS,
+        {
+            'SuperUnitsSubscriptionNAV': 'creation',
+            'SuperUnitsCancelNAV': 'redemption',
+        },
+        'PublishDate',
+        int,
+    )
 
     async def live_navps(self) -> LeveragedTadbirPardazLiveNAVPS:
         j_raw: str = await self._json('Fund/GetLeveragedNAV')
-        j: dict = loads(j_raw)
-
-        pop = j.pop
-        date_str = j.pop('PublishDate')
+        return self._live_navps(_loads(j_raw))  # type: ignore
 
-        result = {}
-        for k in (
-            'BaseUnitsCancelNAV',
-            'BaseUnitsTotalNetAssetValue',
-            'SuperUnitsTotalNetAssetValue',
-        ):
-            result[k] = _comma_float(pop(k))
+    @classmethod
+    def live_navps_frame(cls, raws: Iterable[str | dict]) -> pl.DataFrame:
+        """Convert many raw `Fund/GetLeveragedNAV` responses into a DataFrame.
 
-        result['creation'] = comma_int(pop('SuperUnitsSubscriptionNAV'))
-        result['redemption'] = comma_int(pop('SuperUnitsCancelNAV'))
-
-        for k, v in j.items():
-            result[k] = comma_int(v)
-
-        try:
-            parsed_date = jdatetime.strptime(date_str, '%Y/%m/%d %H:%M:%S')
-        except ValueError:
-            parsed_date = jdatetime.strptime(date_str, '%Y/%m/%d ')
-        result['date'] = parsed_date.togregorian()
-
-        return result  # type: ignore
+        The columns are the keys of `live_navps` with the same types.
+        """
+        return cls._live_navps.frame(
+            [_loads(r) if isinstance(r, str) else r for r in raws]
+        )
 
     async def leverage(self) -> float:
         navps, cache = await gather(self.live_navps(), self.cache())
@@ -0,0 +1,182 @@
+"""Concurrently fetch the live NAVPS of all the funds in the dataset.
+
+Run ``python -m iranetf.snapshot`` to print a snapshot of the whole market.
+Use `iter_live_navps` to process each fund as soon as its site responds::
+
+    async for l18, navps in iter_live_navps(type='Stock'):
+        ...
+"""
+
+from __future__ import annotations as _
+
+from asyncio import (
+    Semaphore as _Semaphore,
+    as_completed as _as_completed,
+    ensure_future as _ensure_future,
+    timeout as _timeout,
+)
+from collections import defaultdict as _defaultdict
+from collections.abc import (
+    AsyncIterator as _AsyncIterator,
+    Awaitable as _Awaitable,
+    Callable as _Callable,
+)
+from operator import methodcaller as _methodcaller
+from time import perf_counter as _perf_counter
+from typing import Any as _Any
+
+import polars as _pl
+
+from iranetf import _deadline_expired, _host, registry as _registry
+from iranetf.dataset import scan_dataset as _scan_dataset
+from iranetf.sites import BaseSite as _BaseSite, LiveNAVPS as _LiveNAVPS
+
+_SCHEMA = {
+    'l18': _pl.String,
+    'creation': _pl.Int64,
+    'redemption': _pl.Int64,
+    'date': _pl.Datetime,
+    'latency': _pl.Float64,
+    'error': _pl.String,
+}
+
+
+class _Scheduler:
+    """Bound the number of concurrent calls, both globally and per host.
+
+    Each call is given `deadline` seconds to complete; an expired deadline
+    counts as a failure of the host in `iranetf.circuit_breaker`. Exceptions
+    are returned instead of being raised so that one failing site does not
+    abort the rest.
+    """
+
+    __slots__ = '_global', '_hosts', 'deadline'
+
+    def __init__(self, limit: int, per_host_limit: int, deadline: float):
+        self._global = _Semaphore(limit)
+        self._hosts: _defaultdict[str, _Semaphore] = _defaultdict(
+            lambda: _Semaphore(per_host_limit)
+        )
+        self.deadline = deadline
+
+    async def run(
+        self, site: _BaseSite, call: _Callable[[_BaseSite], _Awaitable]
+    ) -> tuple[_Any | Exception, float]:
+        # acquire the host semaphore first so that requests waiting for a busy
+        # host do not occupy the global slots
+        async with self._hosts[_host(site.url)], self._global:
+            start = _perf_counter()
+            deadline = _timeout(self.deadline)
+            try:
+                async with deadline:
+                    result = await call(site)
+            except Exception as e:
+                if deadline.expired():
+                    _deadline_expired(site.url)
+                result = e
+            return result, _perf_counter() - start
+
+
+def _sites(
+    type: str | None, site_type: str | None, group_id: int | None
+) -> dict[str, _BaseSite]:
+    lf = _scan_dataset().filter(_pl.col('site_type').is_not_null())
+    for column, value in (
+        ('type', type),
+        ('site_type', site_type),
+        ('group_id', group_id),
+    ):
+        if value is not None:
+            lf = lf.filter(_pl.col(column) == value)
+    l18s = lf.select('l18').collect()['l18']
+    return {l18: _registry.site('l18', l18) for l18 in l18s}
+
+
+async def _iter_results(
+    sites: dict[str, _BaseSite],
+    call: _Callable[[_BaseSite], _Awaitable],
+    scheduler: _Scheduler,
+) -> _AsyncIterator[tuple[str, _Any | Exception, float]]:
+    async def run(l18: str, site: _BaseSite):
+        return l18, *await scheduler.run(site, call)
+
+    tasks = [_ensure_future(run(l18, site)) for l18, site in sites.items()]
+    try:
+        for next_done in _as_completed(tasks):
+            yield await next_done
+    finally:  # the consumer may stop early
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_live_navps(
+    *,
+    type: str | None = None,
+    site_type: str | None = None,
+    group_id: int | None = None,
+    limit: int = 64,
+    per_host_limit: int = 4,
+    deadline: float = 10.0,
+) -> _AsyncIterator[tuple[str, _LiveNAVPS | Exception]]:
+    """Yield ``(l18, live_navps)`` of the dataset funds as they complete.
+
+    Only the funds that match the given `type`, `site_type`, and `group_id`
+    are fetched. The concurrency arguments are the same as `snapshot`. The
+    exception is yielded instead of the live NAVPS of failed sites.
+    """
+    async for l18, result, _latency in _iter_results(
+        _sites(type, site_type, group_id),
+        _methodcaller('live_navps'),
+        _Scheduler(limit, per_host_limit, deadline),
+    ):
+        yield l18, result
+
+
+def _row(l18: str, result: _Any, latency: float) -> dict:
+    if isinstance(result, Exception):
+        return {'l18': l18, 'latency': latency, 'error': repr(result)}
+    return {
+        'l18': l18,
+        'creation': result['creation'],
+        'redemption': result['redemption'],
+        'date': result['date'],
+        'latency': latency,
+    }
+
+
+async def snapshot(
+    *,
+    type: str | None = None,
+    site_type: str | None = None,
+    group_id: int | None = None,
+    limit: int = 64,
+    per_host_limit: int = 4,
+    deadline: float = 10.0,
+) -> _pl.DataFrame:
+    """Return the live NAVPS of every fund in the dataset, sorted by l18.
+
+    `type`, `site_type`, and `group_id` filter the funds of the dataset.
+    At most `limit` requests are in flight at any time, no more than
+    `per_host_limit` of them to the same host, and each site has `deadline`
+    seconds to respond. Failed sites are reported in the `error` column.
+    """
+    rows = [
+        _row(l18, result, latency)
+        async for l18, result, latency in _iter_results(
+            _sites(type, site_type, group_id),
+            _methodcaller('live_navps'),
+            _Scheduler(limit, per_host_limit, deadline),
+        )
+    ]
+    return _pl.DataFrame(rows, schema=_SCHEMA).sort('l18')
+
+
+def _main():
+    from asyncio import run
+
+    with _pl.Config(tbl_rows=-1):
+        print(run(snapshot()))
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,25 @@
+from unittest.mock import AsyncMock, Mock
+
+from iranetf import analytics
+
+
+async def test_leverage_table(monkeypatch):
+    sites = {
+        'b': Mock(
+            url='https://b.ir/',
+            cache=AsyncMock(return_value=0.25),
+            leverage=AsyncMock(return_value=1.5),
+        ),
+        'a': Mock(
+            url='https://a.ir/',
+            cache=AsyncMock(side_effect=TimeoutError),
+            leverage=AsyncMock(return_value=1.0),
+        ),
+    }
+    monkeypatch.setattr(analytics, '_sites', lambda *_: sites)
+    df = await analytics.leverage_table()
+    assert df['l18'].to_list() == ['a', 'b']
+    assert df['cash'].to_list() == [None, 0.25]
+    assert df['leverage'].to_list() == [None, 1.5]
+    assert df['error'][0] == 'TimeoutError()'
+    assert df['error'][1] is None
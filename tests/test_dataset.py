@@ -0,0 +1,95 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import polars as pl
+from yarl import URL
+
+import iranetf
+from iranetf import dataset
+from iranetf.dataset import _DATASET_IPC_PATH, _scan_csv
+
+TESTDATA = Path(__file__).parent / 'testdata'
+
+
+def test_ipc_dataset_matches_csv():
+    assert pl.read_ipc(_DATASET_IPC_PATH).equals(_scan_csv().collect()), (
+        'dataset.arrow is stale, run iranetf.dataset.compile_dataset()'
+    )
+
+
+async def test_url_type_is_memoized(monkeypatch):
+    known = {'example.ir': ['https://example.ir/', 'MabnaDP2']}
+    monkeypatch.setattr(dataset, '_url_types', lambda: known)
+    assert await dataset._url_type('example.ir') == (
+        'https://example.ir/',
+        'MabnaDP2',
+    )
+
+
+def _home_page(monkeypatch, url: str, content: bytes) -> AsyncMock:
+    response = Mock(url=URL(url), read=AsyncMock(return_value=content))
+    get = AsyncMock(return_value=response)
+    monkeypatch.setattr(iranetf, '_get', get)
+    return get
+
+
+async def test_fingerprint_multinav_as_tadbirpardaz(monkeypatch):
+    content = (TESTDATA / 'mofidsectorfund.html').read_bytes()
+    get = _home_page(monkeypatch, 'https://mofidsectorfund.com/', content)
+    assert await dataset._fingerprint('mofidsectorfund.com') == (
+        'https://mofidsectorfund.com/',
+        'TadbirPardaz',
+    )
+    get.assert_awaited_once_with('http://mofidsectorfund.com/')
+
+
+async def test_url_type_probes_apis_if_fingerprint_is_inconclusive(
+    monkeypatch,
+):
+    _home_page(monkeypatch, 'https://example.ir/', b'<html></html>')
+    known = {}
+    monkeypatch.setattr(dataset, '_url_types', lambda: known)
+    probed = []
+
+    async def check_validity(site):
+        probed.append(type(site))
+        if type(site) is dataset._MabnaDP2:
+            return 'https://example.ir/', 'MabnaDP2'
+
+    monkeypatch.setattr(dataset, '_check_validity', check_validity)
+    assert await dataset._url_type('example.ir') == (
+        'https://example.ir/',
+        'MabnaDP2',
+    )
+    assert probed == [*dataset.SITE_TYPES]
+    assert known == {'example.ir': ['https://example.ir/', 'MabnaDP2']}
+
+
+async def test_url_type_skips_probes_if_fingerprinted(monkeypatch):
+    content = (TESTDATA / 'mofidsectorfund.html').read_bytes()
+    _home_page(monkeypatch, 'https://mofidsectorfund.com/', content)
+    monkeypatch.setattr(dataset, '_url_types', dict)
+    check_validity = AsyncMock()
+    monkeypatch.setattr(dataset, '_check_validity', check_validity)
+    assert await dataset._url_type('mofidsectorfund.com') == (
+        'https://mofidsectorfund.com/',
+        'TadbirPardaz',
+    )
+    check_validity.assert_not_awaited()
+
+
+async def test_log_and_retry_keeps_traceback_of_bugs(caplog):
+    @dataset._log_and_retry
+    async def buggy(_):
+        raise KeyError('bug')
+
+    @dataset._log_and_retry
+    async def not_found(_):
+        raise ConnectionRefusedError
+
+    assert not await buggy('https://example.ir/')
+    assert not await not_found('https://example.ir/')
+    bug, refused = caplog.records
+    assert bug.exc_info is not None
+    assert bug.exc_info[0] is KeyError
+    assert refused.exc_info is None
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import polars as pl
+from pytest_aiohutils import file, files
+
+from iranetf.history import read_history, update_history
+from iranetf.sites import RayanHamafza2, TadbirPardaz
+
+yaqut = RayanHamafza2('https://yaghootfund.ir/')
+
+
+@file('yaqut_navps_history.json')
+async def test_update_history(tmp_path):
+    new = await update_history(yaqut, tmp_path)
+    assert new.height > 0
+    assert new['date'].is_sorted()
+    assert new['date'].is_unique().all()
+
+    # drop the last stored days, the next update should only add them back
+    stored = read_history(yaqut, tmp_path).collect()
+    last = stored['date'].max()
+    assert isinstance(last, date)
+    stored.filter(pl.col('date') <= last - timedelta(days=10)).write_parquet(
+        tmp_path / 'yaghootfund.ir-1.parquet'
+    )
+    delta = await update_history(yaqut, tmp_path)
+    assert 0 < delta.height <= 10
+    assert read_history(yaqut, tmp_path).collect().equals(stored)
+
+    assert (await update_history(yaqut, tmp_path)).is_empty()
+
+
+@files(
+    'modir_navps_history.json',
+    'shetab_nav_history_1.html',
+    'shetab_nav_history_2.html',
+    'shetab_nav_history_3.html',
+)
+async def test_update_tadbirpardaz_history(tmp_path):
+    # the update is read from the NAV report instead of the whole chart
+    site = TadbirPardaz('https://modirfund.ir/')
+    stored = await update_history(site, tmp_path)
+    new = await update_history(site, tmp_path)
+    assert new.height == 50
+    assert (new['date'] > stored['date'].max()).all()
+    assert new.schema == stored.schema
+    history = read_history(site, tmp_path).collect()
+    assert history.schema == stored.schema
+    assert history.height == stored.height + new.height
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, Mock
+
+from aiohttp import ClientConnectionError, ClientSession, ClientTimeout
+from aiohutils.session import SessionManager
+from pytest import raises
+
+import iranetf
+
+
+async def test_configure_http(monkeypatch):
+    manager = SessionManager(iranetf._connector)
+    monkeypatch.setattr(iranetf, '_session_managers', [manager])
+    monkeypatch.setattr(iranetf, '_connector_kwargs', {})
+
+    timeout = ClientTimeout(total=5.0)
+    iranetf.configure_http(limit=10, limit_per_host=2, timeout=timeout)
+    assert manager.timeout is timeout
+    connector = manager.connector()
+    assert connector is not None
+    assert (connector.limit, connector.limit_per_host) == (10, 2)
+    await connector.close()
+
+    session = manager._session = ClientSession()
+    with raises(RuntimeError):
+        iranetf.configure_http(limit=20)
+
+    await session.close()
+    iranetf.configure_http(limit=20)
+    assert manager._session is None
+    assert iranetf._connector_kwargs == {'limit': 20, 'limit_per_host': 2}
+
+
+async def test_circuit_breaker(monkeypatch):
+    breaker = iranetf.CircuitBreaker(threshold=2, cooldown=60.0)
+    monkeypatch.setattr(iranetf, 'circuit_breaker', breaker)
+    request = AsyncMock(side_effect=ClientConnectionError)
+    monkeypatch.setattr(iranetf, 'session_manager', Mock(request=request))
+
+    for _ in range(2):
+        with raises(ClientConnectionError):
+            await iranetf._request('https://example.ir/api')
+    with raises(iranetf.CircuitOpenError):
+        await iranetf._request('https://example.ir/api')
+    assert request.await_count == 2
+
+    breaker.cooldown = 0.0  # half-open
+    request.side_effect = None
+    await iranetf._request('https://example.ir/api')
+    assert not breaker.is_open('example.ir')
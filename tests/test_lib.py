@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+import polars as pl
+from jdatetime import date as jdate
+
+from iranetf.sites._lib import _jymd_to_greg
+
+
+def test_jymd_to_greg_matches_jdatetime():
+    start = jdate(1300, 1, 1)
+    jdates = [start + timedelta(days=i) for i in range(72_684)]
+    assert jdates[-1] == jdate(1498, 12, 30)
+    s = pl.Series([f'{d:%Y/%m/%d}' for d in jdates])
+    assert pl.select(_jymd_to_greg(pl.lit(s))).to_series().to_list() == [
+        d.togregorian() for d in jdates
+    ]
+
+
+def test_jymd_to_greg_input_forms():
+    s = pl.Series(
+        ['1403/12/30', ' ۱۴۰۳/۱۲/۳۰ ', '1404/1/1', None, '1402/12/29']
+    )
+    assert pl.select(_jymd_to_greg(pl.lit(s))).to_series().to_list() == [
+        jdate(1403, 12, 30).togregorian(),  # a leap day
+        jdate(1403, 12, 30).togregorian(),
+        jdate(1404, 1, 1).togregorian(),
+        None,
+        jdate(1402, 12, 29).togregorian(),
+    ]
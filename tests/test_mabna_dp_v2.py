@@ -4,6 +4,7 @@ import polars as pl
 from pytest_aiohutils import file, file_map, files
 
 from iranetf.sites import BaseSite, MabnaDP2
+from iranetf.sites._mabnadp import _home_datas
 from tests import (
     assert_date_column,  # Swapped from assert_date_index
     assert_leveraged_leverage,
@@ -46,7 +47,14 @@ async def test_cache():
 
 @file('home.html')
 async def test_home_data():
+    _home_datas.clear()
     d = await site.home_data()
+    assert d.keys() == {
+        '__REACT_QUERY_STATE__',
+        '__REACT_REDUX_STATE__',
+        '__ENV__',
+    }
+    assert await site.home_data() is d
     assert d['__REACT_QUERY_STATE__'].keys() == {'mutations', 'queries'}
     assert d['__REACT_REDUX_STATE__'].keys() == {
         'general',
@@ -62,6 +70,7 @@ async def test_home_data():
 
 @files('home.html', 'lmdp_aa.json')
 async def test_leverage():
+    _home_datas.clear()
     await assert_leveraged_leverage(site)
 
 
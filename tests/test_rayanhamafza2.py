@@ -1,9 +1,12 @@
 from math import isclose
+from unittest.mock import AsyncMock, patch
 
-from pytest_aiohutils import file, files, validate_dict
+import polars as pl
+from pytest_aiohutils import file, file_map, files, validate_dict
 
 from iranetf.sites import (
     BaseSite,
+    MultiPortfolio,
     RayanHamafza2,
 )
 from iranetf.sites._rayanhamafza import FundItem
@@ -82,3 +85,69 @@ async def test_fund_data():
 async def test_portfolios():
     ps = await petro_agah.portfolios()
     assert ps['2'] == 'اتو آگاه'
+
+
+@file_map(
+    ('fundItems', 'petro_agah_fund_items.json'),
+    ('', 'petro_agah_aa.json'),
+)
+async def test_multi_portfolio_asset_allocation():
+    multi = MultiPortfolio(petro_agah)
+    sites = await multi.sites()
+    assert [*sites] == ['1', '2', '3', '4']
+    assert sites['2'] == auto_agah
+    df = await multi.asset_allocation()
+    assert df['portfolio_id'].to_list() == ['1', '2', '3', '4']
+    assert 'cashTodayPercent' in df.columns
+
+
+@file_map(
+    ('fundItems', 'petro_agah_fund_items.json'),
+    ('fundLiveInfo/2', 'autoagah.json'),
+    ('', 'petroagah.json'),
+)
+async def test_multi_portfolio_live_navps():
+    df = await MultiPortfolio(petro_agah).live_navps()
+    assert df.schema == pl.Schema(
+        {
+            'portfolio_id': pl.String,
+            'creation': pl.Int64,
+            'redemption': pl.Int64,
+            'date': pl.Datetime('us'),
+        }
+    )
+    assert df['portfolio_id'].to_list() == ['1', '2', '3', '4']
+    assert df['creation'].to_list() == [23703, 11015, 23703, 23703]
+
+
+@file_map(
+    ('fundItems', 'petro_agah_fund_items.json'),
+    ('', 'yaqut_navps_history.json'),
+)
+async def test_multi_portfolio_navps_history():
+    single = (await auto_agah.navps_history()).collect()
+    df = (await MultiPortfolio(petro_agah).navps_history()).collect()
+    assert df.columns == [*single.columns, 'portfolio_id']
+    assert df.height == 4 * single.height
+    assert df['portfolio_id'].unique(maintain_order=True).to_list() == [
+        '1',
+        '2',
+        '3',
+        '4',
+    ]
+    assert (
+        df.filter(pl.col('portfolio_id') == '2')
+        .drop('portfolio_id')
+        .equals(single)
+    )
+
+
+async def test_multi_portfolio_without_portfolios():
+    with patch.object(RayanHamafza2, 'portfolios', AsyncMock(return_value={})):
+        multi = MultiPortfolio(petro_agah)
+        history = (await multi.navps_history()).collect()
+        live = await multi.live_navps()
+    assert history.schema == pl.Schema({'portfolio_id': pl.String})
+    assert history.is_empty()
+    assert live.is_empty()
+    assert live.columns == ['portfolio_id', 'creation', 'redemption', 'date']
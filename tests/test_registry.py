@@ -0,0 +1,50 @@
+from pytest import raises
+
+from iranetf import registry
+from iranetf.sites import BaseSite, RayanHamafza2
+
+
+def test_site_is_memoized():
+    site = registry.site('l18', 'اتوآگاه')
+    assert site is BaseSite.from_l18('اتوآگاه')
+    assert site in registry.sites('url', 'https://agahsectorfund.ir/')
+
+
+def test_ambiguous_key():
+    with raises(KeyError):
+        registry.site('reg_no', '12093')
+    sites = registry.sites('reg_no', '12093')
+    assert len(sites) > 1
+    assert all(isinstance(s, RayanHamafza2) for s in sites)
+
+
+def test_missing_key():
+    with raises(KeyError):
+        registry.site('l18', 'not an l18')
+    assert registry.sites('ins_code', '0') == []
+
+
+def test_from_keys():
+    steel = BaseSite.from_l18('استیل')
+    assert (
+        BaseSite.from_ins_code(registry.rows('l18', 'استیل')[0]['ins_code'])
+        is steel
+    )
+    assert BaseSite.from_reg_no('12150', '2') is steel
+    assert BaseSite.from_url_cached(steel.url, '2') is steel
+    with raises(KeyError):
+        BaseSite.from_url_cached(steel.url)
+
+
+def test_from_name():
+    name = registry.rows('l18', 'اهرم')[0]['name']
+    ahrom = BaseSite.from_l18('اهرم')
+    assert BaseSite.from_name(name) is ahrom
+    assert BaseSite.from_name(name.replace('ی', 'ي')[:-1]) is ahrom
+
+
+def test_clear():
+    site = BaseSite.from_l18('اهرم')
+    registry.clear()
+    assert BaseSite.from_l18('اهرم') is not site
+    assert BaseSite.from_l18('اهرم') == site
@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+from iranetf.response_cache import CachedResponse, HTTPCache
+
+
+def test_kind():
+    kind = HTTPCache.kind
+    assert kind('https://modirfund.ir/Fund/GetETFNAV') == 'live'
+    assert kind('https://modirfund.ir/Chart/TotalNAV') == 'history'
+    assert kind('https://yaghootfund.ir/') == 'home'
+    assert kind('https://modirfund.ir/Chart/AssetCompositions') == 'default'
+
+
+def test_lru_eviction(tmp_path):
+    cache = HTTPCache(tmp_path / 'c.sqlite', max_size=10)
+    cache.store('a', 'https://a/', b'12345')
+    cache.store('b', 'https://b/', b'12345')
+    assert cache.load('a') is not None  # makes `b` the least recently used
+    cache.store('c', 'https://c/', b'12345')
+    assert cache.load('b') is None
+    assert cache.load('a') is not None
+    assert cache.size() == 10
+
+    cache.store('c', 'https://c/', b'123')  # replaces the stored body
+    assert cache.size() == 8
+    cache.close()
+    cache = HTTPCache(tmp_path / 'c.sqlite', max_size=10)
+    assert cache.size() == 8
+    cache.clear()
+    assert cache.size() == 0
+
+
+async def test_fresh_response_is_served_from_disk(tmp_path):
+    cache = HTTPCache(tmp_path / 'c.sqlite')
+    url = 'https://modirfund.ir/Chart/TotalNAV'
+    key = cache.key(url, {'type': 'getnavtotal'})
+    cache.store(key, url, b'[]')
+    with patch('iranetf._request', side_effect=NotImplementedError):
+        r = await cache.get(url, {'type': 'getnavtotal'})
+    assert isinstance(r, CachedResponse)
+    assert await r.read() == b'[]'
+
+
+async def test_revalidation(tmp_path):
+    cache = HTTPCache(tmp_path / 'c.sqlite', ttls={'history': 0})
+    url = 'https://modirfund.ir/Chart/TotalNAV'
+    cache.store(url, url, b'[]', etag='"v1"')
+    not_modified = Mock(status=304, headers={})
+    with patch(
+        'iranetf._request', AsyncMock(return_value=not_modified)
+    ) as request:
+        r = await cache.get(url)
+    request.assert_called_once_with(url, None, None, {'If-None-Match': '"v1"'})
+    assert await r.read() == b'[]'
+    not_modified.release.assert_called_once_with()
@@ -0,0 +1,135 @@
+from unittest.mock import AsyncMock, Mock
+
+from aiohttp import ClientConnectionError, ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from pytest import raises
+from yarl import URL
+
+import iranetf
+from iranetf.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Failure,
+    RetryPolicy,
+)
+
+URL_ = 'https://example.ir/'
+
+
+def _response_error(status: int, **headers) -> ClientResponseError:
+    request_info = RequestInfo(
+        URL(URL_), 'GET', CIMultiDictProxy(CIMultiDict())
+    )
+    return ClientResponseError(
+        request_info, (), status=status, headers=CIMultiDict(headers)
+    )
+
+
+async def test_transient_errors_are_retried():
+    func = AsyncMock(side_effect=[TimeoutError, _response_error(503), 'ok'])
+    assert await RetryPolicy(base_delay=0.0).call(func, URL_) == 'ok'
+    assert func.await_count == 3
+
+
+async def test_failure():
+    func = AsyncMock(side_effect=_response_error(404))
+    result = await RetryPolicy(base_delay=0.0).call(func, URL_)
+    assert isinstance(result, Failure)
+    assert not result
+    assert result.attempts == 1
+    assert result.host == 'example.ir'
+    assert isinstance(result.error, ClientResponseError)
+
+
+async def test_keyword_only_method():
+    class Site:
+        url = URL_
+
+        def __init__(self):
+            self.errors = [TimeoutError(), _response_error(404)]
+
+        async def nav_history(self, *, to: str) -> str:
+            if self.errors:
+                raise self.errors.pop(0)
+            return to
+
+    policy = RetryPolicy(base_delay=0.0)
+    site = Site()
+    result = await policy.call(site.nav_history, to='1404/01/01')
+    assert result.host == 'example.ir'
+    assert isinstance(result.error, ClientResponseError)
+    assert await policy(site.nav_history)(to='1404/01/01') == '1404/01/01'
+
+
+def test_retry_after():
+    policy = RetryPolicy(max_delay=10.0)
+    assert policy.delay(0, _response_error(429, **{'Retry-After': '3'})) == 3.0
+    assert (
+        policy.delay(0, _response_error(429, **{'Retry-After': '60'})) == 10.0
+    )
+    assert 0.0 <= policy.delay(3, TimeoutError()) <= 4.0
+
+
+async def test_budget():
+    policy = RetryPolicy(base_delay=0.0, budget=1.0)
+    func = AsyncMock(side_effect=TimeoutError)
+    result = await policy.call(func, URL_)
+    assert result.attempts == 2
+    result = await policy.call(func, URL_)
+    assert result.attempts == 1
+
+
+async def test_circuit_breaker():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.0)
+    policy = RetryPolicy(attempts=1, breaker=breaker)
+    func = AsyncMock(side_effect=TimeoutError)
+    await policy.call(func, URL_)
+    assert not breaker.is_open('example.ir')
+    await policy.call(func, URL_)
+    assert breaker.is_open('example.ir')
+
+    breaker.cooldown = 60.0
+    result = await policy.call(func, URL_)
+    assert isinstance(result.error, CircuitOpenError)
+    assert func.await_count == 2
+
+    breaker.cooldown = 0.0
+    func.side_effect = None
+    func.return_value = 'ok'
+    assert await policy.call(func, URL_) == 'ok'
+    assert not breaker.is_open('example.ir')
+
+
+def _session(monkeypatch, **kwargs) -> AsyncMock:
+    request = AsyncMock(**kwargs)
+    monkeypatch.setattr(iranetf, 'session_manager', Mock(request=request))
+    return request
+
+
+async def test_shared_circuit_breaker(monkeypatch):
+    policy = RetryPolicy(attempts=1)  # created before the breaker is replaced
+    breaker = CircuitBreaker(threshold=2)
+    monkeypatch.setattr(iranetf, 'circuit_breaker', breaker)
+    _session(monkeypatch, side_effect=ClientConnectionError)
+    result = await policy.call(iranetf._request, URL_)
+    assert isinstance(result.error, ClientConnectionError)
+    # counted once, by iranetf._request
+    assert breaker._failures == {'example.ir': 1}
+    await policy.call(iranetf._request, URL_)
+    result = await policy.call(iranetf._request, URL_)
+    assert isinstance(result.error, CircuitOpenError)
+
+    monkeypatch.setattr(iranetf, 'circuit_breaker', None)
+    result = await policy.call(iranetf._request, URL_)
+    assert isinstance(result.error, ClientConnectionError)
+
+
+async def test_policy_without_circuit_breaker(monkeypatch):
+    breaker = CircuitBreaker(threshold=1)
+    breaker.failure('example.ir')
+    monkeypatch.setattr(iranetf, 'circuit_breaker', breaker)
+    _session(monkeypatch, return_value='ok')
+    policy = RetryPolicy(breaker=None)
+    assert await policy.call(iranetf._request, URL_) == 'ok'
+    with raises(CircuitOpenError):
+        await iranetf._request(URL_)
@@ -0,0 +1,48 @@
+from asyncio import sleep
+from datetime import datetime
+from unittest.mock import Mock
+
+import iranetf
+from iranetf import snapshot
+
+
+def _site(url: str, delay: float, error: Exception | None = None) -> Mock:
+    async def live_navps():
+        await sleep(delay)
+        if error is not None:
+            raise error
+        return {'creation': 2, 'redemption': 1, 'date': datetime(2025, 1, 1)}
+
+    return Mock(url=url, live_navps=live_navps)
+
+
+SITES = {
+    'slow': _site('https://slow.ir/', 0.05),
+    'fast': _site('https://fast.ir/', 0.0),
+    'bad': _site('https://bad.ir/', 0.01, ValueError('bad')),
+}
+
+
+async def test_iter_live_navps_completion_order(monkeypatch):
+    monkeypatch.setattr(snapshot, '_sites', lambda *_: SITES)
+    results = [r async for r in snapshot.iter_live_navps()]
+    assert [l18 for l18, _ in results] == ['fast', 'bad', 'slow']
+    assert isinstance(results[1][1], ValueError)
+
+
+async def test_snapshot(monkeypatch):
+    monkeypatch.setattr(snapshot, '_sites', lambda *_: SITES)
+    df = await snapshot.snapshot()
+    assert df['l18'].to_list() == ['bad', 'fast', 'slow']
+    assert df['error'].is_null().to_list() == [False, True, True]
+
+
+async def test_expired_deadline_is_a_host_failure(monkeypatch):
+    breaker = iranetf.CircuitBreaker(threshold=2, cooldown=60.0)
+    monkeypatch.setattr(iranetf, 'circuit_breaker', breaker)
+    hung = {'hung': _site('https://hung.ir/', 60.0)}
+    monkeypatch.setattr(snapshot, '_sites', lambda *_: hung)
+    for _ in range(2):
+        df = await snapshot.snapshot(deadline=0.01)
+        assert df['error'].to_list() == ['TimeoutError()']
+    assert breaker.is_open('hung.ir')
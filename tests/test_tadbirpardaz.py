@@ -1,16 +1,21 @@
 from datetime import date
-from unittest.mock import patch
+from json import loads
+from pathlib import Path
+from unittest.mock import Mock, patch
 
 import polars as pl
 from pytest import raises, skip
 from pytest_aiohutils import file, files, validate_dict
 
+import iranetf
 from iranetf.sites import (
     BaseSite,
     TadbirPardaz,
     TadbirPardazMultiNAV,
     TPLiveNAVPS,
 )
+from iranetf.sites._lib import _detected_sites, _read
+from iranetf.sites._tadbirpardaz import _table_columns
 from tests import assert_date_column, assert_navps_history, validate_live_navps
 
 tadbir = TadbirPardaz('https://modirfund.ir/')
@@ -21,6 +26,14 @@ async def test_live_navps():
     await validate_live_navps(tadbir)
 
 
+@file('modir_live.json')
+async def test_pluggable_json_loads(monkeypatch):
+    loads = Mock(side_effect=iranetf.json_loads)
+    monkeypatch.setattr(iranetf, 'json_loads', loads)
+    await tadbir.live_navps()
+    assert loads.call_count == 2  # the response is a JSON string of JSON
+
+
 @file('modir_navps_history.json')
 async def test_navps_history():
     await assert_navps_history(tadbir)
@@ -114,6 +127,19 @@ async def test_dividend_history():
     assert_date_column(df)
 
 
+@files(
+    'tp_dividend_history_1.html',
+    'tp_dividend_history_2.html',
+    'tp_dividend_history_3.html',
+)
+async def test_dividend_history_serial():
+    site = BaseSite.from_l18('آفاق')
+    assert isinstance(site, TadbirPardaz)
+    df = (await site.dividend_history(concurrency=1)).collect()
+    assert len(df) >= 22
+    assert df['row'].is_sorted()
+
+
 @files(
     'tp_dividend_history_with_date1.html',
     'tp_dividend_history_with_date2.html',
@@ -217,3 +243,57 @@ async def test_navps_history_float(test_config):
     if not test_config['OFFLINE_MODE']:
         return
     await TadbirPardaz.from_l18('سها').navps_history()
+
+
+@file('mofidsectorfund.html')
+async def test_from_url_reuses_home_page():
+    _detected_sites.clear()
+    with patch('iranetf.sites._lib._read', side_effect=_read) as read:
+        site = await BaseSite.from_url(steel.url)
+        assert site == steel
+        assert (await site.home_info())['isETFMultiNavMode'] is True
+        assert await BaseSite.from_url(steel.url) == steel
+        read.assert_called_once_with(steel.url)
+
+        # a cached detection does not restore a cleared home_info
+        steel.clear_home_info()
+        site = await BaseSite.from_url(steel.url)
+        assert read.call_count == 1
+        await site.home_info()
+        assert read.call_count == 2
+
+
+@file('mofidsectorfund.html')
+async def test_portfolios_share_home_info():
+    steel.clear_home_info()
+    other = TadbirPardazMultiNAV(steel.url, '3')
+    with patch('iranetf.sites._lib._read', side_effect=_read) as read:
+        assert await steel.home_info() is await other.home_info()
+    read.assert_called_once_with(steel.url)
+
+
+def test_table_columns():
+    page = (
+        '<td>x</td><tbody><tr><td>1</td><td>a</td><td>extra</td></tr>\n'
+        '<tr><td>2</td></tr>\n<tr></tr></tbody><td>y</td>'
+    )
+    assert _table_columns([page, '<p>no table</p>', page], 2) == [
+        ['1', '2', '1', '2'],
+        ['a', '', 'a', ''],
+    ]
+
+    truncated = '<tbody><tr><td>1</td><td>a</td></tr><tr><td>2</td>'
+    assert _table_columns([truncated, page], 2) == [
+        ['1', '2', '1', '2'],
+        ['a', '', 'a', ''],
+    ]
+
+
+def test_live_navps_frame():
+    raw = loads(
+        (Path(__file__).parent / 'testdata/modir_live.json').read_text()
+    )
+    df = TadbirPardaz.live_navps_frame([raw, raw])
+    expected = TadbirPardaz._live_navps(loads(raw))
+    assert df.columns == [*expected]
+    assert df.row(1, named=True) == expected
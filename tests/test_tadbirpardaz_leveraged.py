@@ -1,5 +1,9 @@
+from asyncio import Event, ensure_future, gather, sleep, wait_for
 from datetime import date
+from json import loads
 from math import isclose
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 import polars as pl
 from pytest_aiohutils import file, files
@@ -8,6 +12,11 @@ from iranetf.sites import (
     BaseSite,
     LeveragedTadbirPardaz,
 )
+from iranetf.sites._lib import _fetch, _get, _in_flight, _waiters
+from iranetf.sites._tadbirpardaz import (
+    _LEVERAGED_NAVPS_NAMES,
+    _leveraged_navps_history,
+)
 from tests import (
     assert_date_column,  # Swapped from assert_date_index
     assert_leveraged_leverage,
@@ -55,11 +64,71 @@ async def test_cache():
     assert 0.0 <= cache <= 0.6
 
 
+@file('ahrom_aa.json')
+async def test_concurrent_requests_are_coalesced():
+    with patch('iranetf.sites._lib._get', side_effect=_get) as get:
+        cache, aa = await gather(ahrom.cache(), ahrom.asset_allocation())
+    get.assert_called_once()
+    assert 0.0 <= cache <= 0.6
+    assert aa
+
+
+async def test_cancelled_callers_cancel_their_request():
+    cancelled = Event()
+
+    async def hang(*_):
+        try:
+            await sleep(60)
+        finally:
+            cancelled.set()
+
+    url = ahrom.url + 'hung'
+    with patch('iranetf.sites._lib._get', AsyncMock(side_effect=hang)):
+        callers = [ensure_future(_fetch(url)) for _ in range(2)]
+        await sleep(0)
+        callers[0].cancel()
+        await sleep(0)
+        assert not cancelled.is_set()  # the other caller still waits
+        callers[1].cancel()
+        await wait_for(cancelled.wait(), 1.0)
+        await gather(*callers, return_exceptions=True)
+    await sleep(0)  # the done callback of the request
+    assert not _in_flight
+    assert not _waiters
+
+
 @files('ahrom_live.json', 'ahrom_aa.json')
 async def test_leverage():
     await assert_leveraged_leverage(ahrom)
 
 
+def test_misaligned_navps_history_series():
+    j = [
+        {'List': [{'x': '1/2/2024', 'y': 2}, {'x': '1/1/2024', 'y': 1}]},
+        {'List': [{'x': '1/3/2024', 'y': 3}, {'x': '1/2/2024', 'y': 4}]},
+    ]
+    df = _leveraged_navps_history(j).collect()
+    assert df.columns == ['date', 'normal_creation', 'normal_statistical']
+    assert df.rows() == [
+        (date(2024, 1, 1), 1.0, None),
+        (date(2024, 1, 2), 2.0, 4.0),
+        (date(2024, 1, 3), None, 3.0),
+    ]
+
+    # the series beyond the known names are ignored
+    j = [
+        {'List': [{'x': '1/1/2024', 'y': i}, {'x': '1/2/2024', 'y': i}]}
+        for i in range(7)
+    ]
+    j[0]['List'].pop()
+    df = _leveraged_navps_history(j).collect()
+    assert df.columns == ['date', *_LEVERAGED_NAVPS_NAMES]
+    assert df.rows() == [
+        (date(2024, 1, 1), 0.0, 1.0, 2.0, 3.0, 4.0, 5.0),
+        (date(2024, 1, 2), None, 1.0, 2.0, 3.0, 4.0, 5.0),
+    ]
+
+
 @file('duplicate_navps_hist.json')
 async def test_pishran_navps_hist():
     site = BaseSite.from_l18('پیشران')
@@ -112,3 +181,14 @@ async def test_nav_history():
         )
 
     assert len(df) == 50
+
+
+def test_live_navps_frame():
+    raw = loads(
+        (Path(__file__).parent / 'testdata/ahrom_live.json').read_text()
+    )
+    df = LeveragedTadbirPardaz.live_navps_frame([raw])
+    expected = LeveragedTadbirPardaz._live_navps(loads(raw))
+    assert df.row(0, named=True) == expected
+    assert df.schema['BaseUnitsCancelNAV'] == pl.Float64
+    assert df.schema['creation'] == pl.Int64